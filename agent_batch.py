@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+C-Agent Batch: análisis de varios proyectos en un solo proceso
+Los proyectos se analizan en paralelo con hilos y comparten un único pool de
+procesos para el análisis de archivos; el resultado es un reporte consolidado.
+"""
+
+import os
+import json
+import time
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from agent_task import SimpleAgentTask
+from agent_report import atomic_write
+
+DEFAULT_BATCH_REPORT = os.path.join('reports', 'batch_analysis.json')
+
+
+def read_project_list(path):
+    """Lee una lista de proyectos (una ruta por línea, '#' para comentarios)"""
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+
+def analyze_project(root, executor=None, **options):
+    """Analiza un proyecto y devuelve su resumen para el reporte consolidado"""
+    start = time.perf_counter()
+    agent = SimpleAgentTask(project_path=root, executor=executor, verbose=False, **options)
+    span = agent.instrumentation.span
+    headers = None
+    try:
+        with span('analyze_files'):
+            agent.analyze_files()
+        headers = agent.begin_header_index()
+        with span('analyze_dependencies'):
+            agent.analyze_dependencies([headers] if headers is not None else ())
+    except Exception as e:
+        agent.instrumentation.error('batch', e)
+    if headers is not None:
+        agent.update_header_index(headers)
+
+    dependencies = {k: v for k, v in agent.results.get('dependencies', {}).items() if k != 'includes_list'}
+    graph = {k: v for k, v in agent.results.get('include_graph', {}).items() if k != 'adjacency'}
+    return {
+        'project': agent.project_path,
+        'seconds': round(time.perf_counter() - start, 6),
+        'files': agent.results.get('files', {}),
+        'dependencies': dependencies,
+        'include_graph': graph,
+        'code_metrics': agent.results.get('code_metrics', {}).get('totals', {}),
+        'instrumentation': agent.instrumentation.to_report(),
+    }
+
+
+def consolidate(projects):
+    """Totales del lote a partir de los resúmenes por proyecto"""
+    totals = {
+        'projects': len(projects),
+        'projects_with_errors': 0,
+        'c_files': 0,
+        'h_files': 0,
+        'py_files': 0,
+        'total_includes': 0,
+        'system_includes': 0,
+        'local_includes': 0,
+        'include_cycles': 0,
+        'code_lines': 0,
+        'functions': 0,
+    }
+    for project in projects:
+        files = project['files']
+        dependencies = project['dependencies']
+        if 'error' in files or 'error' in dependencies or project['instrumentation']['errors']:
+            totals['projects_with_errors'] += 1
+        for key in ('c_files', 'h_files', 'py_files'):
+            totals[key] += files.get(key, 0)
+        for key in ('total_includes', 'system_includes', 'local_includes'):
+            totals[key] += dependencies.get(key, 0)
+        totals['include_cycles'] += len(project['include_graph'].get('cycles', []))
+        totals['code_lines'] += project['code_metrics'].get('code', 0)
+        totals['functions'] += project['code_metrics'].get('functions', 0)
+    return totals
+
+
+def run_batch(roots, jobs=0, concurrency=4, report_path=DEFAULT_BATCH_REPORT, **options):
+    """Analiza roots con `concurrency` proyectos a la vez y un pool de `jobs` procesos compartido"""
+    jobs = jobs or os.cpu_count() or 1
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as threads:
+        if jobs > 1:
+            with ProcessPoolExecutor(max_workers=jobs) as processes:
+                futures = [threads.submit(analyze_project, root, processes, jobs=jobs, **options)
+                           for root in roots]
+                projects = [future.result() for future in futures]
+        else:
+            futures = [threads.submit(analyze_project, root, jobs=1, **options) for root in roots]
+            projects = [future.result() for future in futures]
+
+    report = {
+        'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'seconds': round(time.perf_counter() - start, 6),
+        'totals': consolidate(projects),
+        'projects': projects,
+    }
+    with atomic_write(report_path) as f:
+        json.dump(report, f, indent=2)
+    report['report_path'] = report_path
+    return report
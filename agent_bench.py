@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+C-Agent Bench: benchmarks de SimpleAgentTask sobre proyectos C sintéticos
+Genera árboles reproducibles (semilla fija) y mide tiempo y memoria pico de
+cada fase del análisis, con salida JSON para seguir regresiones entre versiones.
+"""
+
+import os
+import sys
+import io
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import contextlib
+from datetime import datetime
+
+from agent_task import SimpleAgentTask
+
+PHASES = ('scan', 'analyze_files', 'analyze_dependencies', 'get_project_size', 'write_reports')
+SYSTEM_HEADERS = ('stdio.h', 'stdlib.h', 'string.h', 'stdint.h', 'errno.h', 'unistd.h', 'pthread.h')
+MARKER = '.agent_bench.json'
+
+
+def generate_tree(root, files=1000, fanout=5, file_size=2048, depth=3, seed=1):
+    """Genera un proyecto C sintético y reproducible en root.
+
+    La mitad de los archivos son cabeceras. Cada archivo incluye `fanout`
+    cabeceras del proyecto (rutas relativas a la raíz, resolubles con -I .)
+    y alguna cabecera del sistema, y se rellena hasta ~file_size bytes. Los
+    archivos se reparten en directorios anidados hasta `depth` niveles.
+    """
+    params = {'files': files, 'fanout': fanout, 'file_size': file_size, 'depth': depth, 'seed': seed}
+    marker = os.path.join(root, MARKER)
+    try:
+        with open(marker) as f:
+            if json.load(f) == params:
+                return root  # Árbol ya generado con los mismos parámetros
+    except (OSError, ValueError):
+        pass
+
+    rng = random.Random(seed)
+    branching = max(2, round(max(files / 50, 1) ** (1 / max(depth, 1))))
+
+    def directory(index):
+        parts = []
+        for level in range(depth):
+            parts.append(f'd{level}_{index % branching}')
+            index //= branching
+        return os.path.join('src', *parts)
+
+    headers = [os.path.join(directory(i), f'h{i}.h') for i in range(0, files, 2)]
+    filler = 'static int value_%d = %d; /* relleno */\n'
+
+    for i in range(files):
+        is_header = i % 2 == 0
+        rel = os.path.join(directory(i), f'h{i}.h' if is_header else f'c{i}.c')
+        path = os.path.join(root, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        lines = [f'#include <{rng.choice(SYSTEM_HEADERS)}>\n']
+        for header in rng.sample(headers, min(fanout, len(headers))):
+            if header != rel:
+                lines.append(f'#include "{header}"\n')
+        size = sum(len(line) for line in lines)
+        n = 0
+        while size < file_size:
+            line = filler % (n, i)
+            lines.append(line)
+            size += len(line)
+            n += 1
+        with open(path, 'w') as f:
+            f.writelines(lines)
+
+    with open(marker, 'w') as f:
+        json.dump(params, f)
+    return root
+
+
+def _run_phases(root, use_cache, jobs, memory):
+    """Ejecuta las fases una vez; devuelve {fase: segundos} o {fase: bytes pico}"""
+    agent = SimpleAgentTask(project_path=root, use_cache=use_cache, jobs=jobs, include_paths=('.',))
+    steps = {
+        'scan': agent.scan,
+        'analyze_files': agent.analyze_files,
+        'analyze_dependencies': agent.analyze_dependencies,
+        'get_project_size': agent.get_project_size,
+        'write_reports': lambda: (agent.generate_report(), agent.create_summary()),
+    }
+    measures = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for phase in PHASES:
+            if memory:
+                tracemalloc.reset_peak()
+                steps[phase]()
+                measures[phase] = tracemalloc.get_traced_memory()[1]
+            else:
+                start = time.perf_counter()
+                steps[phase]()
+                measures[phase] = time.perf_counter() - start
+    return measures
+
+
+def benchmark(root, repeat=3, use_cache=False, jobs=1):
+    """Mide cada fase: mejor tiempo de `repeat` ejecuciones y memoria pico (tracemalloc)"""
+    timings = [_run_phases(root, use_cache, jobs, memory=False) for _ in range(repeat)]
+    tracemalloc.start()
+    try:
+        peaks = _run_phases(root, use_cache, jobs, memory=True)
+    finally:
+        tracemalloc.stop()
+    phases = {
+        phase: {
+            'seconds': round(min(t[phase] for t in timings), 6),
+            'peak_bytes': peaks[phase],
+        }
+        for phase in PHASES
+    }
+    return {
+        'phases': phases,
+        'total_seconds': round(sum(p['seconds'] for p in phases.values()), 6),
+        'peak_bytes': max(p['peak_bytes'] for p in phases.values()),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='C-Agent: benchmarks sobre proyectos C sintéticos')
+    parser.add_argument('--scales', default='1000,10000',
+                        help='Número de archivos por árbol, separados por comas (p. ej. 1000,10000,100000)')
+    parser.add_argument('--fanout', type=int, default=5, help='Includes del proyecto por archivo')
+    parser.add_argument('--file-size', type=int, default=2048, help='Tamaño aproximado de cada archivo en bytes')
+    parser.add_argument('--depth', type=int, default=3, help='Niveles de directorios anidados')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=3, help='Ejecuciones cronometradas por escala (se toma la mejor)')
+    parser.add_argument('--jobs', type=int, default=1)
+    parser.add_argument('--cache', action='store_true', help='Medir con la caché incremental activa (ejecución en caliente)')
+    parser.add_argument('--workdir', help='Directorio donde generar (y reutilizar) los árboles sintéticos')
+    parser.add_argument('--output', help='Archivo JSON de salida (por defecto, salida estándar)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    workdir = args.workdir or os.path.join(tempfile.gettempdir(), 'c-agent-bench')
+    scales = [int(s) for s in args.scales.split(',') if s.strip()]
+
+    results = []
+    for files in scales:
+        root = os.path.join(workdir, f'tree_{files}_f{args.fanout}_s{args.file_size}_d{args.depth}_r{args.seed}')
+        print(f"🏗️  Generando árbol de {files} archivos en {root}...", file=sys.stderr)
+        generate_tree(root, files, args.fanout, args.file_size, args.depth, args.seed)
+        print(f"⏱️  Midiendo {files} archivos...", file=sys.stderr)
+        result = benchmark(root, repeat=args.repeat, use_cache=args.cache, jobs=args.jobs)
+        result['files'] = files
+        results.append(result)
+
+    output = {
+        'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': {
+            'fanout': args.fanout, 'file_size': args.file_size, 'depth': args.depth,
+            'seed': args.seed, 'repeat': args.repeat, 'jobs': args.jobs, 'cache': args.cache,
+        },
+        'results': results,
+    }
+    text = json.dumps(output, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+        print(f"📊 Resultados guardados en: {args.output}", file=sys.stderr)
+    else:
+        print(text)
+    return output
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+C-Agent Cache: caché incremental de análisis en disco (SQLite)
+Guarda por archivo (mtime, tamaño, hash de contenido, includes, métricas) para
+no releer los archivos que no cambiaron entre ejecuciones.
+"""
+
+import os
+import json
+import sqlite3
+
+# Se incrementa cuando cambia el formato de los datos guardados
+CACHE_VERSION = 3
+
+
+class AnalysisCache:
+    def __init__(self, path):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._rows = None
+        self._dirty = {}
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._ensure_schema()
+
+    def _ensure_schema(self):
+        version = self._conn.execute('PRAGMA user_version').fetchone()[0]
+        if version != CACHE_VERSION:
+            self._conn.execute('DROP TABLE IF EXISTS files')
+            self._conn.execute(f'PRAGMA user_version = {CACHE_VERSION}')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS files ('
+            ' path TEXT PRIMARY KEY,'
+            ' mtime REAL NOT NULL,'
+            ' size INTEGER NOT NULL,'
+            ' hash TEXT NOT NULL,'
+            ' includes TEXT NOT NULL,'
+            ' metrics TEXT)'
+        )
+        self._conn.commit()
+
+    def _load(self):
+        """Carga toda la tabla de una vez: una sola consulta por ejecución"""
+        if self._rows is None:
+            self._rows = {
+                path: (mtime, size, digest, includes, metrics)
+                for path, mtime, size, digest, includes, metrics
+                in self._conn.execute('SELECT path, mtime, size, hash, includes, metrics FROM files')
+            }
+        return self._rows
+
+    def get(self, entry):
+        """Devuelve (includes, métricas) guardados si (mtime, tamaño) no cambiaron"""
+        row = self._load().get(entry.path)
+        if row is not None and row[0] == entry.mtime and row[1] == entry.size:
+            self.hits += 1
+            return json.loads(row[3]), json.loads(row[4]) if row[4] else None
+        return None
+
+    def put(self, entry, digest, includes, metrics=None):
+        """Registra un archivo leído; se escribe en disco con save()"""
+        row = self._load().get(entry.path)
+        if row is not None and row[2] == digest:
+            # Contenido idéntico (p. ej. tras un touch): solo se actualiza mtime
+            self.hits += 1
+        else:
+            self.misses += 1
+        self._store(entry, digest, includes, metrics)
+
+    def _store(self, entry, digest, includes, metrics):
+        row = (entry.mtime, entry.size, digest, json.dumps(includes),
+               json.dumps(metrics) if metrics is not None else None)
+        self._load()[entry.path] = row
+        self._dirty[entry.path] = row
+
+    def save(self, live_paths=None):
+        """Escribe los cambios en una sola transacción y elimina archivos borrados"""
+        with self._conn:
+            if self._dirty:
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO files (path, mtime, size, hash, includes, metrics) VALUES (?, ?, ?, ?, ?, ?)',
+                    [(path,) + row for path, row in self._dirty.items()]
+                )
+                self._dirty = {}
+            if live_paths is not None:
+                stale = [path for path in self._load() if path not in live_paths]
+                for path in stale:
+                    del self._rows[path]
+                self._conn.executemany('DELETE FROM files WHERE path = ?', [(p,) for p in stale])
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+C-Agent Daily: resumen diario del proyecto
+Se genera con los resultados en memoria de un único análisis, sin volver a
+recorrer el árbol con find/grep como hacía daily_agent.sh.
+"""
+
+import os
+from datetime import datetime
+
+from agent_report import atomic_write
+
+DAILY_SUMMARY = 'daily_summary.md'
+
+
+def render_daily_summary(results, project_path, date=None):
+    """Markdown del resumen diario a partir de los resultados de SimpleAgentTask"""
+    date = date or datetime.now().strftime('%a %b %d %H:%M:%S %Y')
+    files = results.get('files', {})
+    dependencies = results.get('dependencies', {})
+    dashboard = os.path.join(project_path, 'dashboard.html')
+    return f"""# C-Agent Daily Summary - {date}
+
+## Quick Stats
+- **C Files:** {files.get('c_files', 0)}
+- **Header Files:** {files.get('h_files', 0)}
+- **Python Files:** {files.get('py_files', 0)}
+- **Total Includes:** {dependencies.get('total_includes', 0)}
+
+## Action Items
+- [ ] Review security analysis
+- [ ] Update documentation
+- [ ] Check for new dependencies
+- [ ] Optimize code structure
+
+## Commands for tomorrow
+```bash
+# Quick analysis
+python3 agent_task.py daily
+
+# Check dependencies
+grep -r "#include" src/ | head -10
+
+# Count lines of code
+wc -l src/*.c
+```
+
+## Dashboard Access
+Open: file://{dashboard}
+"""
+
+
+def write_daily_summary(results, project_path, path=None):
+    """Escribe el resumen diario (por defecto, daily_summary.md en la raíz) y devuelve su ruta"""
+    path = path or os.path.join(project_path, DAILY_SUMMARY)
+    with atomic_write(path) as f:
+        f.write(render_daily_summary(results, project_path))
+    return path
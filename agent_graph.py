@@ -0,0 +1,495 @@
+#!/usr/bin/env python3
+"""
+C-Agent Graph: grafo de dependencias entre archivos por #include
+Resuelve los includes contra las rutas configuradas, detecta ciclos (Tarjan)
+y calcula qué archivos .c se recompilan al cambiar cada cabecera.
+"""
+
+import os
+
+from agent_includes import SYSTEM, LOCAL
+from agent_scanner import scan_order_key
+
+# El grafo incremental se reconstruye sin los nodos de archivos eliminados
+# cuando estos pasan de la cuarta parte de los nodos (y son al menos tantos)
+COMPACT_MIN_REMOVED = 256
+COMPACT_RATIO = 4
+
+
+class IncludeGraph:
+    def __init__(self, include_paths=()):
+        # Rutas de búsqueda relativas a la raíz del proyecto (equivalente a -I)
+        self.include_paths = [os.path.normpath(p) for p in include_paths]
+        self.nodes = []          # id -> ruta tal como la devuelve el recorrido
+        self.ids = {}            # ruta normalizada -> id
+        self.adjacency = []      # id -> ids incluidos (ordenados, sin duplicados)
+        self.unresolved_local = 0
+        self._reverse = None
+        self._sccs = None
+
+    def _add_node(self, path):
+        key = os.path.normpath(path)
+        node = self.ids.get(key)
+        if node is None:
+            node = len(self.nodes)
+            self.ids[key] = node
+            self.nodes.append(path)
+            self.adjacency.append(())
+        return node
+
+    def _candidates(self, path, kind, header):
+        """Rutas (normalizadas) donde se busca un include, en orden"""
+        candidates = []
+        if kind == LOCAL:
+            candidates.append(os.path.join(os.path.dirname(path), header))
+        if kind in (LOCAL, SYSTEM):
+            candidates.extend(os.path.join(p, header) for p in self.include_paths)
+        return [os.path.normpath(candidate) for candidate in candidates]
+
+    def resolve(self, path, kind, header):
+        """Id del archivo al que apunta un include, o None si es externo al proyecto"""
+        for candidate in self._candidates(path, kind, header):
+            node = self.ids.get(candidate)
+            if node is not None:
+                return node
+        return None
+
+    def add_nodes(self, paths):
+        """Registra los archivos del proyecto antes de añadir sus includes"""
+        for path in paths:
+            self._add_node(path)
+        return self
+
+    def add_file(self, path, includes):
+        """Resuelve los includes de un archivo ya registrado (o nuevo) y guarda sus aristas.
+
+        Permite construir el grafo en streaming: una vez registrados todos los
+        nodos con add_nodes, los includes de cada archivo se pueden descartar
+        en cuanto se añaden.
+        """
+        node = self._add_node(path)
+        self.adjacency[node], unresolved = self._targets(path, includes)
+        self.unresolved_local += unresolved
+        self._reverse = None
+        self._sccs = None
+        return node
+
+    def _targets(self, path, includes):
+        """(ids incluidos ordenados y sin duplicados, includes locales sin resolver)"""
+        targets = set()
+        unresolved = 0
+        for kind, header in includes:
+            target = self.resolve(path, kind, header)
+            if target is not None:
+                targets.add(target)
+            elif kind == LOCAL:
+                unresolved += 1
+        return tuple(sorted(targets)), unresolved
+
+    def build(self, per_file):
+        """Construye el grafo a partir de (ruta, includes) de cada archivo"""
+        per_file = [(path, includes) for path, includes in per_file if includes is not None]
+        self.add_nodes(path for path, _ in per_file)
+        for path, includes in per_file:
+            self.add_file(path, includes)
+        return self
+
+    @property
+    def edge_count(self):
+        return sum(len(targets) for targets in self.adjacency)
+
+    def is_source(self, node):
+        return self.nodes[node].endswith('.c')
+
+    def strongly_connected_components(self):
+        """Componentes fuertemente conexas (Tarjan iterativo, O(V + E)).
+
+        Se devuelven en orden topológico inverso: cada componente aparece
+        antes que las que la incluyen.
+        """
+        if self._sccs is None:
+            self._sccs = self._tarjan(range(len(self.nodes)))
+        return self._sccs
+
+    def _tarjan(self, roots):
+        """Componentes fuertemente conexas de los nodos alcanzables desde roots"""
+        adjacency = self.adjacency
+        n = len(self.nodes)
+        index = [-1] * n
+        low = [0] * n
+        on_stack = [False] * n
+        stack = []
+        components = []
+        counter = 0
+
+        for root in roots:
+            if index[root] != -1:
+                continue
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+            work = [(root, 0)]
+            while work:
+                node, i = work[-1]
+                targets = adjacency[node]
+                if i < len(targets):
+                    work[-1] = (node, i + 1)
+                    target = targets[i]
+                    if index[target] == -1:
+                        index[target] = low[target] = counter
+                        counter += 1
+                        stack.append(target)
+                        on_stack[target] = True
+                        work.append((target, 0))
+                    elif on_stack[target] and index[target] < low[node]:
+                        low[node] = index[target]
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    if low[node] < low[parent]:
+                        low[parent] = low[node]
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+        return components
+
+    def cycles(self):
+        """Ciclos de includes: componentes con más de un archivo o que se incluyen a sí mismas"""
+        found = []
+        for component in self.strongly_connected_components():
+            if len(component) > 1 or component[0] in self.adjacency[component[0]]:
+                found.append(sorted(self.nodes[node] for node in component))
+        found.sort()
+        return found
+
+    def rebuild_counts(self):
+        """Número de archivos .c que dependen (transitivamente) de cada archivo.
+
+        Se propaga un bitset de archivos .c (enteros de Python) por el grafo
+        condensado en orden topológico: un solo recorrido de las aristas.
+        """
+        components = self.strongly_connected_components()
+        component_of = [0] * len(self.nodes)
+        for ci, component in enumerate(components):
+            for node in component:
+                component_of[node] = ci
+
+        bits = [0] * len(components)
+        source_bit = 0
+        for node in range(len(self.nodes)):
+            if self.is_source(node):
+                bits[component_of[node]] |= 1 << source_bit
+                source_bit += 1
+
+        # Las componentes que incluyen van después en la lista: se recorre al revés
+        for ci in range(len(components) - 1, -1, -1):
+            mask = bits[ci]
+            if not mask:
+                continue
+            for node in components[ci]:
+                for target in self.adjacency[node]:
+                    cj = component_of[target]
+                    if cj != ci:
+                        bits[cj] |= mask
+
+        return {self.nodes[node]: bin(bits[component_of[node]]).count('1')
+                for node in range(len(self.nodes))}
+
+    def _reverse_adjacency(self):
+        if self._reverse is None:
+            reverse = [[] for _ in self.nodes]
+            for node, targets in enumerate(self.adjacency):
+                for target in targets:
+                    reverse[target].append(node)
+            self._reverse = reverse
+        return self._reverse
+
+    def find(self, name):
+        """Id de un archivo por ruta (relativa a la raíz) o, si no es ambigua, por sufijo"""
+        node = self.ids.get(os.path.normpath(name))
+        if node is not None:
+            return node
+        suffix = os.sep + os.path.normpath(name)
+        matches = [n for key, n in self.ids.items() if key.endswith(suffix)]
+        return matches[0] if len(matches) == 1 else None
+
+    def impacted_sources(self, name):
+        """Archivos .c que se recompilan si cambia el archivo indicado"""
+        start = self.find(name)
+        if start is None:
+            return None
+        reverse = self._reverse_adjacency()
+        seen = {start}
+        pending = [start]
+        while pending:
+            node = pending.pop()
+            for includer in reverse[node]:
+                if includer not in seen:
+                    seen.add(includer)
+                    pending.append(includer)
+        return sorted(self.nodes[node] for node in seen if self.is_source(node))
+
+    def to_report(self, top=10):
+        """Resumen exportable a JSON: tamaño, ciclos, cabeceras críticas y adyacencia"""
+        counts = self.rebuild_counts()
+        headers = sorted(
+            ((path, count) for path, count in counts.items() if not path.endswith('.c')),
+            key=lambda item: (-item[1], item[0])
+        )
+        return {
+            'nodes': len(self.nodes),
+            'edges': self.edge_count,
+            'unresolved_local_includes': self.unresolved_local,
+            'include_paths': self.include_paths,
+            'cycles': self.cycles(),
+            'top_rebuild_headers': [{'header': path, 'rebuilds': count} for path, count in headers[:top]],
+            'adjacency': self.adjacency_report(),
+        }
+
+    def adjacency_report(self):
+        """ruta -> rutas incluidas, solo de los archivos con aristas"""
+        return {
+            self.nodes[node]: [self.nodes[target] for target in targets]
+            for node, targets in enumerate(self.adjacency) if targets
+        }
+
+
+class IncrementalIncludeGraph(IncludeGraph):
+    """Grafo que se conserva entre análisis (modo watch).
+
+    Guarda los includes de cada archivo y, al actualizarse, solo vuelve a
+    resolver los archivos cuyos includes cambian (o que incluyen un nombre
+    que aparece o desaparece del proyecto). Ciclos y número de recompilaciones
+    se recalculan únicamente en los nodos alcanzables desde las aristas
+    modificadas. Los archivos eliminados quedan como nodos sin aristas hasta
+    que son demasiados; entonces sync_nodes devuelve un grafo compacto nuevo.
+    """
+
+    def __init__(self, include_paths=()):
+        super().__init__(include_paths)
+        self.includes = []       # id -> includes leídos del archivo
+        self.removed = set()     # ids de archivos que ya no existen
+        self._unresolved = []    # id -> includes locales sin resolver
+        self._by_name = {}       # nombre base de cabecera -> ids que la incluyen
+        self._changed = set()    # ids cuyos includes hay que volver a resolver
+        self._seeds = set()      # ids cuyas aristas o bit propio cambiaron desde refresh()
+        self._names = set()      # nombres base de archivos añadidos o eliminados
+        self._reverse = []       # id -> ids que lo incluyen
+        self._bits = []          # id -> bitset de archivos .c que dependen de él
+        self._counts = []        # id -> bits activos en _bits (recompilaciones)
+        self._source_bit = {}    # id de archivo .c -> bit
+        self._cycles = {}        # nodo representante -> (ids, rutas ordenadas)
+        self._paths = {}         # ruta tal como llega -> id (evita normalizarla en cada análisis)
+        self._adjacency = {}     # adyacencia exportable, actualizada arista a arista
+
+    def _add_node(self, path):
+        key = os.path.normpath(path)
+        node = self.ids.get(key)
+        if node is None:
+            node = super()._add_node(path)
+            self.includes.append(())
+            self._unresolved.append(0)
+            self._reverse.append(set())
+            self._bits.append(0)
+            self._counts.append(0)
+            if self.is_source(node):
+                self._source_bit[node] = len(self._source_bit)
+        elif node in self.removed:
+            self.removed.discard(node)
+        else:
+            return node
+        self._names.add(os.path.basename(key))
+        self._changed.add(node)
+        return node
+
+    def resolve(self, path, kind, header):
+        # Los archivos eliminados siguen en ids, pero ya no resuelven includes
+        for candidate in self._candidates(path, kind, header):
+            node = self.ids.get(candidate)
+            if node is not None and node not in self.removed:
+                return node
+        return None
+
+    def _index_names(self, node, includes, present):
+        for _, header in includes:
+            name = os.path.basename(header)
+            if present:
+                self._by_name.setdefault(name, set()).add(node)
+            else:
+                includers = self._by_name.get(name)
+                if includers is not None:
+                    includers.discard(node)
+
+    def sync_nodes(self, paths):
+        """Registra los archivos nuevos, deja sin aristas los que ya no están en paths
+        y vuelve a resolver los que incluyen el nombre de alguno de ellos.
+
+        Devuelve el grafo a usar a partir de ahora: este mismo o, si los nodos
+        eliminados pasan del umbral, uno compacto con solo los de paths.
+        """
+        for path in paths:
+            node = self._paths.get(path)
+            if node is None or node in self.removed:
+                self._paths[path] = self._add_node(path)
+        live = set(paths)
+        for node, path in enumerate(self.nodes):
+            if node not in self.removed and path not in live:
+                self._index_names(node, self.includes[node], False)
+                self.includes[node] = ()
+                self.removed.add(node)
+                self._changed.add(node)
+                self._names.add(os.path.basename(os.path.normpath(path)))
+        if len(self.removed) >= COMPACT_MIN_REMOVED and len(self.removed) * COMPACT_RATIO >= len(self.nodes):
+            return self.compacted()
+        self._resolve_changed()
+        return self
+
+    def compacted(self):
+        """Grafo nuevo con los mismos archivos vigentes e includes, sin nodos
+        eliminados: ids y bits de los .c vuelven a ser consecutivos. Ciclos y
+        recompilaciones se recalculan enteros en el siguiente refresh()."""
+        graph = type(self)(self.include_paths)
+        live = [node for node in range(len(self.nodes)) if node not in self.removed]
+        for node in live:
+            graph._paths[self.nodes[node]] = graph._add_node(self.nodes[node])
+        for new, node in enumerate(live):
+            graph.includes[new] = self.includes[node]
+            graph._index_names(new, self.includes[node], True)
+        graph._resolve_changed()
+        return graph
+
+    def set_file(self, path, includes):
+        """Actualiza los includes de un archivo (None si no se pudo leer) y devuelve su id.
+
+        Con los nodos ya sincronizados (sync_nodes) sus aristas quedan
+        resueltas al volver; ciclos y recompilaciones esperan a refresh().
+        """
+        node = self._paths.get(path)
+        if node is None or node in self.removed:
+            node = self._paths[path] = self._add_node(path)
+        includes = includes or ()
+        old = self.includes[node]
+        if old is not includes and old != includes:
+            self._index_names(node, old, False)
+            self._index_names(node, includes, True)
+            self.includes[node] = includes
+            self._changed.add(node)
+        if self._changed:
+            self._resolve_changed()
+        return node
+
+    def _resolve_changed(self):
+        """Vuelve a resolver los includes de los archivos marcados como cambiados"""
+        for name in self._names:
+            self._changed.update(self._by_name.get(name, ()))
+        self._names = set()
+        for node in self._changed:
+            if node in self.removed:
+                new, unresolved = (), 0
+            else:
+                new, unresolved = self._targets(self.nodes[node], self.includes[node])
+            self.unresolved_local += unresolved - self._unresolved[node]
+            self._unresolved[node] = unresolved
+            old = self.adjacency[node]
+            if node in self.removed or new != old or (node in self._source_bit and not self._bits[node]):
+                self._seeds.add(node)
+            if new == old:
+                continue
+            for target in old:
+                self._reverse[target].discard(node)
+            for target in new:
+                self._reverse[target].add(node)
+            self._seeds.update(old)
+            self._seeds.update(new)
+            self.adjacency[node] = new
+            if new:
+                # Mismo orden que un grafo construido desde cero (el del recorrido)
+                self._adjacency[self.nodes[node]] = sorted((self.nodes[target] for target in new),
+                                                           key=scan_order_key)
+            else:
+                self._adjacency.pop(self.nodes[node], None)
+        self._changed = set()
+
+    def refresh(self):
+        """Recalcula ciclos y recompilaciones a partir de las aristas modificadas"""
+        self._resolve_changed()
+        if self._seeds:
+            self._propagate(self._seeds)
+            self._seeds = set()
+
+    def _propagate(self, seeds):
+        """Recalcula componentes y bitsets de los nodos alcanzables desde seeds.
+
+        Los nodos que incluyen a los afectados sin ser alcanzables desde las
+        aristas modificadas conservan su bitset, así que basta con recorrer
+        en orden topológico el subgrafo alcanzable (Tarjan desde las semillas).
+        """
+        components = self._tarjan(seeds)
+        affected = set().union(*components)
+        for key in [key for key, (members, _) in self._cycles.items() if not affected.isdisjoint(members)]:
+            del self._cycles[key]
+
+        # Una componente solo se recalcula si contiene una semilla o si cambió
+        # el bitset de alguno de los archivos que la incluyen
+        adjacency = self.adjacency
+        reverse = self._reverse
+        bits = self._bits
+        dirty = set(seeds)
+        for component in reversed(components):
+            if len(component) > 1 or component[0] in adjacency[component[0]]:
+                members = set(component)
+                self._cycles[component[0]] = (members, sorted(self.nodes[node] for node in component))
+            elif component[0] not in dirty:
+                continue
+            else:
+                members = component
+            if dirty.isdisjoint(component):
+                continue
+            mask = 0
+            for node in component:
+                bit = self._source_bit.get(node)
+                if bit is not None and node not in self.removed:
+                    mask |= 1 << bit
+                for includer in reverse[node]:
+                    if includer not in members:
+                        mask |= bits[includer]
+            for node in component:
+                if bits[node] != mask:
+                    bits[node] = mask
+                    self._counts[node] = mask.bit_count()
+                    dirty.update(adjacency[node])
+        self._sccs = None
+
+    def strongly_connected_components(self):
+        return [component for component in super().strongly_connected_components()
+                if component[0] not in self.removed]
+
+    def cycles(self):
+        return sorted(paths for _, paths in self._cycles.values())
+
+    def rebuild_counts(self):
+        return {self.nodes[node]: self._counts[node]
+                for node in range(len(self.nodes)) if node not in self.removed}
+
+    def _reverse_adjacency(self):
+        return self._reverse
+
+    def find(self, name):
+        node = super().find(name)
+        return None if node in self.removed else node
+
+    def adjacency_report(self):
+        return self._adjacency
+
+    def to_report(self, top=10):
+        report = super().to_report(top)
+        report['nodes'] = len(self.nodes) - len(self.removed)
+        return report
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+C-Agent Headers: índice invertido de cabeceras entre proyectos (SQLite)
+Para cada cabecera, los archivos de todos los proyectos analizados que la
+incluyen. Nombres de cabecera y rutas se guardan una sola vez (ids enteros)
+y cada análisis actualiza solo los archivos que cambiaron desde el anterior;
+los contadores por cabecera se mantienen al actualizar, así que "quién
+incluye X" y "cabeceras más incluidas" son consultas por índice.
+"""
+
+import os
+import time
+import sqlite3
+
+from agent_includes import format_include, SYSTEM, LOCAL, MACRO
+from agent_index import encode_cursor, decode_cursor
+
+HEADERS_VERSION = 1
+# Variable de entorno con la ruta del índice compartido por todos los proyectos
+HEADERS_ENV = 'C_AGENT_HEADERS'
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+DEFAULT_TOP = 20
+# Tiempo que un análisis espera a que otro (p. ej. en modo batch) termine de escribir
+LOCK_TIMEOUT = 60
+# Con más archivos cambiados que estos se leen todas las cabeceras de una vez
+# en lugar de buscar una a una las de los archivos cambiados (modo watch)
+PRELOAD_HEADERS_FILES = 1000
+
+KINDS = (SYSTEM, LOCAL, MACRO)
+KIND_CODES = {kind: code for code, kind in enumerate(KINDS)}
+
+
+def default_headers_path():
+    """Ruta del índice: $C_AGENT_HEADERS o ~/.c-agent/headers.sqlite"""
+    return os.environ.get(HEADERS_ENV) or os.path.join(os.path.expanduser('~'), '.c-agent', 'headers.sqlite')
+
+
+class HeaderIndex:
+    def __init__(self, path=None, readonly=False):
+        self.path = path or default_headers_path()
+        if readonly:
+            self._conn = sqlite3.connect(f'file:{self.path}?mode=ro', uri=True)
+            if self._conn.execute('PRAGMA user_version').fetchone()[0] != HEADERS_VERSION:
+                self._conn.close()
+                raise sqlite3.DatabaseError(f"Versión de índice de cabeceras no soportada: {self.path}")
+        else:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=LOCK_TIMEOUT, isolation_level=None)
+            # WAL: el dashboard y la CLI consultan mientras un análisis escribe
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._ensure_schema()
+
+    def _ensure_schema(self):
+        version = self._conn.execute('PRAGMA user_version').fetchone()[0]
+        if version != HEADERS_VERSION:
+            for table in ('uses', 'files', 'headers', 'projects'):
+                self._conn.execute(f'DROP TABLE IF EXISTS {table}')
+            self._conn.execute(f'PRAGMA user_version = {HEADERS_VERSION}')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS projects ('
+            ' id INTEGER PRIMARY KEY,'
+            ' path TEXT NOT NULL UNIQUE,'
+            ' files INTEGER NOT NULL DEFAULT 0,'
+            ' updated REAL)'
+        )
+        # Contadores de archivos que incluyen cada cabecera, por tipo de include
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS headers ('
+            ' id INTEGER PRIMARY KEY,'
+            ' name TEXT NOT NULL UNIQUE,'
+            ' files INTEGER NOT NULL DEFAULT 0,'
+            ' system INTEGER NOT NULL DEFAULT 0,'
+            ' local INTEGER NOT NULL DEFAULT 0,'
+            ' macro INTEGER NOT NULL DEFAULT 0)'
+        )
+        # mtime y tamaño del archivo en el último análisis, como en la caché
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS files ('
+            ' id INTEGER PRIMARY KEY,'
+            ' project_id INTEGER NOT NULL,'
+            ' path TEXT NOT NULL,'
+            ' mtime REAL,'
+            ' size INTEGER,'
+            ' UNIQUE (project_id, path))'
+        )
+        # El índice invertido: (cabecera, archivo) sin rowid, una cabecera es un rango contiguo
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS uses ('
+            ' header_id INTEGER NOT NULL,'
+            ' file_id INTEGER NOT NULL,'
+            ' kind INTEGER NOT NULL,'
+            ' PRIMARY KEY (header_id, file_id)) WITHOUT ROWID'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS uses_file ON uses (file_id, header_id)')
+        for column in ('files',) + KINDS:
+            self._conn.execute(f'CREATE INDEX IF NOT EXISTS headers_{column} ON headers ({column})')
+
+    def begin(self, project_path, entries, previous=None):
+        """Actualización del proyecto project_path; entries es su recorrido completo.
+
+        previous es la actualización ya escrita del análisis anterior del
+        mismo proyecto (modo watch): si nadie ha escrito el proyecto desde
+        entonces, sus archivos guardados se reutilizan sin releerlos.
+        """
+        return HeaderIndexUpdate(self, os.path.abspath(project_path), entries, previous)
+
+    def _stored_files(self, project_id):
+        return {
+            path: (file_id, mtime, size)
+            for file_id, path, mtime, size in self._conn.execute(
+                'SELECT id, path, mtime, size FROM files WHERE project_id = ?', (project_id,)
+            )
+        }
+
+    def _project_id(self, project_path):
+        row = self._conn.execute('SELECT id FROM projects WHERE path = ?', (project_path,)).fetchone()
+        return row[0] if row else None
+
+    def _project_version(self, project_path):
+        """(id, última actualización) del proyecto: cambia con cada escritura"""
+        return self._conn.execute('SELECT id, updated FROM projects WHERE path = ?', (project_path,)).fetchone()
+
+    def prune(self, project_paths):
+        """Elimina del índice los proyectos de project_paths cuya raíz ya no
+        existe, con sus archivos y contadores; devuelve las rutas eliminadas.
+        Solo se comprueban los proyectos pedidos: una raíz que no se ve desde
+        aquí (volumen sin montar, otra máquina) no se toca si no se pide."""
+        pruned = []
+        self._conn.execute('BEGIN IMMEDIATE')
+        try:
+            for project_path in project_paths:
+                project_path = os.path.abspath(project_path)
+                project_id = self._project_id(project_path)
+                if project_id is None or os.path.isdir(project_path):
+                    continue
+                files = 'SELECT id FROM files WHERE project_id = ?'
+                self._conn.executemany(
+                    'UPDATE headers SET system = system - ?, local = local - ?, macro = macro - ?,'
+                    ' files = files - ? WHERE id = ?',
+                    [(system, local, macro, system + local + macro, header_id)
+                     for header_id, system, local, macro in self._conn.execute(
+                         'SELECT header_id, SUM(kind = 0), SUM(kind = 1), SUM(kind = 2) FROM uses'
+                         f' WHERE file_id IN ({files}) GROUP BY header_id', (project_id,)).fetchall()]
+                )
+                self._conn.execute(f'DELETE FROM uses WHERE file_id IN ({files})', (project_id,))
+                self._conn.execute('DELETE FROM files WHERE project_id = ?', (project_id,))
+                self._conn.execute('DELETE FROM projects WHERE id = ?', (project_id,))
+                pruned.append(project_path)
+            self._conn.execute('DELETE FROM headers WHERE files <= 0')
+            self._conn.execute('COMMIT')
+        except BaseException:
+            self._conn.execute('ROLLBACK')
+            raise
+        return pruned
+
+    def projects(self):
+        """Proyectos indexados con su número de archivos fuente y última actualización"""
+        return [
+            {'project': path, 'files': files, 'updated': updated}
+            for path, files, updated in self._conn.execute('SELECT path, files, updated FROM projects ORDER BY path')
+        ]
+
+    def who_includes(self, header=None, header_prefix=None, project=None, kind=None,
+                     cursor=None, limit=DEFAULT_LIMIT):
+        """Archivos que incluyen header (o cualquier cabecera que empiece por
+        header_prefix), en todos los proyectos o solo en project.
+
+        Los resultados van por cabecera y, dentro de cada una, en el orden en
+        que se indexaron los archivos; next_cursor da la página siguiente.
+        """
+        if not header and not header_prefix:
+            raise ValueError("Falta la cabecera a buscar")
+        limit = max(1, min(int(limit), MAX_LIMIT))
+        where, params = [], []
+        if header:
+            where.append('h.name = ?')
+            params.append(header)
+        else:
+            where.append('h.name >= ? AND h.name < ?')
+            params.extend((header_prefix, header_prefix[:-1] + chr(ord(header_prefix[-1]) + 1)))
+        if kind:
+            if kind not in KIND_CODES:
+                raise ValueError(f"Tipo de include desconocido: {kind}")
+            where.append('u.kind = ?')
+            params.append(KIND_CODES[kind])
+        if project:
+            project_id = self._project_id(os.path.abspath(project))
+            if project_id is None:
+                return {'items': [], 'next_cursor': None, 'total': 0}
+            where.append('f.project_id = ?')
+            params.append(project_id)
+        if cursor:
+            where.append('(h.name, u.file_id) > (?, ?)')
+            params.extend(decode_cursor(cursor, (str, int)))
+        rows = self._conn.execute(
+            'SELECT h.name, u.file_id, u.kind, p.path, f.path FROM headers h'
+            ' JOIN uses u ON u.header_id = h.id'
+            ' JOIN files f ON f.id = u.file_id'
+            ' JOIN projects p ON p.id = f.project_id'
+            ' WHERE ' + ' AND '.join(where) +
+            ' ORDER BY h.name, u.file_id LIMIT ?',
+            params + [limit + 1]
+        ).fetchall()
+        result = {
+            'items': [
+                {'header': name, 'project': project_path, 'file': path,
+                 'include': format_include(KINDS[code], name)}
+                for name, _, code, project_path, path in rows[:limit]
+            ],
+            'next_cursor': encode_cursor(list(rows[limit - 1][:2])) if len(rows) > limit else None,
+        }
+        if header and not project and not kind:
+            # El contador mantenido al actualizar: sin recorrer el índice
+            row = self._conn.execute('SELECT files FROM headers WHERE name = ?', (header,)).fetchone()
+            result['total'] = row[0] if row else 0
+        return result
+
+    def top_headers(self, kind=None, limit=DEFAULT_TOP):
+        """Cabeceras incluidas por más archivos (de un tipo: system, local, macro)"""
+        column = 'files' if kind is None else kind
+        if column not in ('files',) + KINDS:
+            raise ValueError(f"Tipo de include desconocido: {kind}")
+        limit = max(1, min(int(limit), MAX_LIMIT))
+        return [
+            {'header': name, 'files': files, 'system': system, 'local': local, 'macro': macro}
+            for name, files, system, local, macro in self._conn.execute(
+                f'SELECT name, files, system, local, macro FROM headers WHERE {column} > 0'
+                f' ORDER BY {column} DESC LIMIT ?', (limit,)
+            )
+        ]
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class HeaderIndexUpdate:
+    """Cambios de un proyecto acumulados durante el análisis y escritos en commit().
+
+    add_source recibe cada archivo fuente como los demás consumidores de
+    analyze_dependencies. Los que tienen el mismo mtime y tamaño que en el
+    índice no se guardan: solo se marcan como vistos. Todo se escribe en una
+    transacción corta al final, de modo que varios análisis a la vez (modo
+    batch) no se bloquean durante la lectura de archivos.
+    """
+
+    def __init__(self, index, project_path, entries, previous=None):
+        self.index = index
+        self.project_path = project_path
+        self._stamps = {entry.path: (entry.mtime, entry.size) for entry in entries if entry.ext in ('.c', '.h')}
+        self._version = index._project_version(project_path)
+        if (previous is not None and previous.project_path == project_path and previous.index.path == index.path
+                and previous._version is not None and previous._version == self._version):
+            # Nadie ha escrito el proyecto desde el análisis anterior: sus archivos
+            # guardados son los que dejó ese análisis
+            self._stored = previous._stored
+        else:
+            self._stored = index._stored_files(self._version[0]) if self._version is not None else {}
+        self._seen = set()
+        self._changed = []     # (ruta, {cabecera: código de tipo}) de los archivos nuevos o modificados
+        self.updated = 0
+        self.removed = 0
+
+    def add_source(self, path, includes, metrics=None):
+        if includes is None:
+            # Ilegible: se trata como si no existiera
+            return
+        self._seen.add(path)
+        stored = self._stored.get(path)
+        if stored is not None and stored[1:] == self._stamps.get(path):
+            return
+        headers = {}
+        for kind, header in includes:
+            # Una fila por (cabecera, archivo): cuenta el primer include de la cabecera
+            headers.setdefault(header, KIND_CODES[kind])
+        self._changed.append((path, headers))
+
+    def commit(self):
+        conn = self.index._conn
+        deltas = {}
+
+        def count(header_id, code, sign):
+            delta = deltas.get(header_id)
+            if delta is None:
+                delta = deltas[header_id] = [0, 0, 0]
+            delta[code] += sign
+
+        def drop_uses(file_id):
+            for header_id, code in conn.execute('SELECT header_id, kind FROM uses WHERE file_id = ?', (file_id,)):
+                count(header_id, code, -1)
+            conn.execute('DELETE FROM uses WHERE file_id = ?', (file_id,))
+
+        def lookup_header(name):
+            found = names.get(name)
+            if found is None:
+                row = conn.execute('SELECT id FROM headers WHERE name = ?', (name,)).fetchone()
+                found = names[name] = row[0] if row else conn.execute('INSERT INTO headers (name) VALUES (?)',
+                                                                      (name,)).lastrowid
+            return found
+
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('INSERT INTO projects (path) VALUES (?) ON CONFLICT (path) DO NOTHING', (self.project_path,))
+            version = self.index._project_version(self.project_path)
+            project_id = version[0]
+            # Releído dentro de la transacción si otro análisis del mismo proyecto escribió entretanto
+            stored = self._stored if version == self._version else self.index._stored_files(project_id)
+            stored = dict(stored)
+            if len(self._changed) > PRELOAD_HEADERS_FILES:
+                names = dict(conn.execute('SELECT name, id FROM headers'))
+            else:
+                names = {}
+
+            for path, headers in self._changed:
+                mtime, size = self._stamps.get(path, (None, None))
+                row = stored.get(path)
+                if row is None:
+                    file_id = conn.execute('INSERT INTO files (project_id, path, mtime, size) VALUES (?, ?, ?, ?)',
+                                           (project_id, path, mtime, size)).lastrowid
+                else:
+                    file_id = row[0]
+                    drop_uses(file_id)
+                    conn.execute('UPDATE files SET mtime = ?, size = ? WHERE id = ?', (mtime, size, file_id))
+                stored[path] = (file_id, mtime, size)
+                uses = []
+                for header, code in headers.items():
+                    used_id = lookup_header(header)
+                    uses.append((used_id, file_id, code))
+                    count(used_id, code, 1)
+                conn.executemany('INSERT INTO uses (header_id, file_id, kind) VALUES (?, ?, ?)', uses)
+                self.updated += 1
+
+            for path in [path for path in stored if path not in self._seen]:
+                file_id = stored.pop(path)[0]
+                drop_uses(file_id)
+                conn.execute('DELETE FROM files WHERE id = ?', (file_id,))
+                self.removed += 1
+
+            conn.executemany(
+                'UPDATE headers SET system = system + ?, local = local + ?, macro = macro + ?,'
+                ' files = files + ? WHERE id = ?',
+                [(system, local, macro, system + local + macro, header_id)
+                 for header_id, (system, local, macro) in deltas.items() if system or local or macro]
+            )
+            conn.execute('DELETE FROM headers WHERE files <= 0')
+            updated = time.time()
+            conn.execute('UPDATE projects SET files = ?, updated = ? WHERE id = ?', (len(stored), updated, project_id))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        self._changed = []
+        # Lo que queda escrito, para el análisis siguiente del mismo proyecto (modo watch)
+        self._stored = stored
+        self._version = (project_id, updated)
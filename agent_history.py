@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+C-Agent History: histórico de métricas de cada análisis (SQLite)
+Serie temporal de solo inserción, indexada por (métrica, instante), con un
+resumen diario mantenido al insertar para consultar años de datos al instante.
+"""
+
+import os
+import math
+import time
+import sqlite3
+from datetime import datetime
+
+HISTORY_VERSION = 1
+DAY = 86400
+DEFAULT_POINTS = 200
+MAX_POINTS = 5000
+
+
+def run_metrics(results, instrumentation=None, project_size=None):
+    """Métricas planas ({nombre: valor}) de un análisis a partir de sus resultados"""
+    metrics = {}
+    files = results.get('files', {})
+    for key in ('c_files', 'h_files', 'py_files', 'total_files'):
+        if key in files:
+            metrics[f'files.{key}'] = files[key]
+    dependencies = results.get('dependencies', {})
+    for key in ('total_includes', 'system_includes', 'local_includes'):
+        if key in dependencies:
+            metrics[f'dependencies.{key}'] = dependencies[key]
+    graph = results.get('include_graph', {})
+    if graph:
+        metrics['include_graph.nodes'] = graph['nodes']
+        metrics['include_graph.edges'] = graph['edges']
+        metrics['include_graph.cycles'] = len(graph['cycles'])
+    code = results.get('code_metrics', {}).get('totals', {})
+    for key in ('lines', 'code', 'comment', 'blank', 'functions'):
+        if key in code:
+            metrics[f'code.{key}'] = code[key]
+    if project_size is not None:
+        metrics['project.size_bytes'] = project_size
+    if instrumentation is not None:
+        # Solo las fases de primer nivel: los spans anidados son detalle de perfilado
+        for name, span in instrumentation.spans.items():
+            if '/' not in name:
+                metrics[f'phase.{name}.seconds'] = span['seconds']
+    return metrics
+
+
+def parse_time(value):
+    """Instante en segundos desde epoch a partir de un número o una fecha ISO"""
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+class HistoryStore:
+    def __init__(self, path, readonly=False):
+        self.path = path
+        if readonly:
+            self._conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+        else:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            self._conn = sqlite3.connect(path)
+            # WAL: el dashboard lee mientras el agente escribe
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._ensure_schema()
+
+    def _ensure_schema(self):
+        version = self._conn.execute('PRAGMA user_version').fetchone()[0]
+        if version != HISTORY_VERSION:
+            self._conn.execute('DROP TABLE IF EXISTS samples')
+            self._conn.execute('DROP TABLE IF EXISTS daily')
+            self._conn.execute(f'PRAGMA user_version = {HISTORY_VERSION}')
+        # Clave primaria (métrica, instante) sin rowid: un rango es un recorrido contiguo del índice
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS samples ('
+            ' metric TEXT NOT NULL,'
+            ' ts REAL NOT NULL,'
+            ' value REAL NOT NULL,'
+            ' PRIMARY KEY (metric, ts)) WITHOUT ROWID'
+        )
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS daily ('
+            ' metric TEXT NOT NULL,'
+            ' day INTEGER NOT NULL,'
+            ' count INTEGER NOT NULL,'
+            ' total REAL NOT NULL,'
+            ' min REAL NOT NULL,'
+            ' max REAL NOT NULL,'
+            ' PRIMARY KEY (metric, day)) WITHOUT ROWID'
+        )
+        self._conn.commit()
+
+    def record(self, metrics, ts=None):
+        """Añade las métricas de una ejecución en una sola transacción"""
+        ts = time.time() if ts is None else ts
+        day = int(ts // DAY) * DAY
+        rows = [(name, float(value)) for name, value in metrics.items() if value is not None]
+        with self._conn:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO samples (metric, ts, value) VALUES (?, ?, ?)',
+                [(name, ts, value) for name, value in rows]
+            )
+            self._conn.executemany(
+                'INSERT INTO daily (metric, day, count, total, min, max) VALUES (?, ?, 1, ?, ?, ?)'
+                ' ON CONFLICT (metric, day) DO UPDATE SET'
+                ' count = count + 1, total = total + excluded.total,'
+                ' min = MIN(min, excluded.min), max = MAX(max, excluded.max)',
+                [(name, day, value, value, value) for name, value in rows]
+            )
+
+    def metrics(self):
+        """Métricas disponibles con su número de muestras y el primer y último día (epoch)"""
+        return [
+            {'metric': metric, 'count': count, 'first_day': first, 'last_day': last}
+            for metric, count, first, last in self._conn.execute(
+                'SELECT metric, SUM(count), MIN(day), MAX(day) FROM daily GROUP BY metric ORDER BY metric'
+            )
+        ]
+
+    def series(self, metric, start=None, end=None, points=DEFAULT_POINTS):
+        """Serie de metric entre start y end reducida a un máximo de `points` cubos.
+
+        Cada cubo trae media, mínimo, máximo y número de muestras. Si el cubo
+        es de un día o más se agrega el resumen diario en lugar de las
+        muestras, de modo que el coste depende de los días, no de las ejecuciones.
+        """
+        points = max(1, min(int(points), MAX_POINTS))
+        if start is None or end is None:
+            first, last = self._conn.execute(
+                'SELECT MIN(ts), MAX(ts) FROM samples WHERE metric = ?', (metric,)
+            ).fetchone()
+            if first is None:
+                return {'metric': metric, 'bucket_seconds': None, 'points': []}
+            start = first if start is None else start
+            end = last if end is None else end
+        bucket = max(1, math.ceil((end - start) / points)) if end > start else 1
+
+        origin = start
+        if bucket >= DAY:
+            bucket = math.ceil(bucket / DAY) * DAY
+            origin = int(start // DAY) * DAY
+            query = (
+                'SELECT CAST((day - :origin) / :bucket AS INTEGER) AS b,'
+                ' SUM(total) / SUM(count), MIN(min), MAX(max), SUM(count)'
+                ' FROM daily WHERE metric = :metric AND day >= :origin AND day <= :end'
+                ' GROUP BY b ORDER BY b'
+            )
+        else:
+            query = (
+                'SELECT CAST((ts - :origin) / :bucket AS INTEGER) AS b,'
+                ' AVG(value), MIN(value), MAX(value), COUNT(*)'
+                ' FROM samples WHERE metric = :metric AND ts >= :start AND ts <= :end'
+                ' GROUP BY b ORDER BY b'
+            )
+        params = {'metric': metric, 'origin': origin, 'start': start, 'end': end, 'bucket': bucket}
+        return {
+            'metric': metric,
+            'from': start,
+            'to': end,
+            'bucket_seconds': bucket,
+            'points': [
+                {'t': origin + b * bucket, 'avg': avg, 'min': low, 'max': high, 'count': count}
+                for b, avg, low, high, count in self._conn.execute(query, params)
+            ],
+        }
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
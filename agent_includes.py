@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+C-Agent Includes: extracción de directivas #include en streaming
+Lee el archivo por bloques en modo binario y busca las directivas a nivel de
+bytes, sin cargar nunca el archivo completo en memoria.
+"""
+
+import re
+import hashlib
+
+# Tamaño de bloque de lectura
+BLOCK_BYTES = 256 * 1024
+# Líneas más largas que esto no pueden ser un #include y se descartan sin acumularlas
+MAX_LINE_BYTES = 64 * 1024
+
+SYSTEM = 'system'
+LOCAL = 'local'
+MACRO = 'macro'
+
+_INCLUDE_RE = re.compile(
+    rb'^[ \t]*#[ \t]*include(?=[ \t<"])[ \t]*'
+    rb'(?:<([^>\r\n]*)>|"([^"\r\n]*)"|([^\s/]\S*))',
+    re.MULTILINE
+)
+
+
+def _collect(includes, data, endpos):
+    for match in _INCLUDE_RE.finditer(data, 0, endpos):
+        system, local, macro = match.groups()
+        if system is not None:
+            includes.append((SYSTEM, system.decode('utf-8', 'replace').strip()))
+        elif local is not None:
+            includes.append((LOCAL, local.decode('utf-8', 'replace').strip()))
+        else:
+            includes.append((MACRO, macro.decode('utf-8', 'replace')))
+
+
+def format_include(kind, header):
+    """Representación normalizada de un include para los reportes"""
+    if kind == SYSTEM:
+        return f'#include <{header}>'
+    if kind == LOCAL:
+        return f'#include "{header}"'
+    return f'#include {header}'
+
+
+def scan_includes(f, hasher=None, metrics=None):
+    """Extrae los includes de un archivo binario abierto como (tipo, cabecera).
+
+    tipo es SYSTEM para <...>, LOCAL para "..." y MACRO para includes
+    calculados (#include HEADER_NAME). Solo cuentan las directivas al inicio de
+    línea (admite espacios y '# include'). Si se pasa un hasher (hashlib), se
+    actualiza con todo el contenido: hash e includes salen de la misma lectura.
+    Si se pasa metrics (agent_metrics.SourceMetrics), recibe los mismos bloques
+    de líneas completas.
+    """
+    includes = []
+    tail = b''
+    skip_line = False
+    while True:
+        block = f.read(BLOCK_BYTES)
+        if not block:
+            break
+        if hasher is not None:
+            hasher.update(block)
+        if skip_line:
+            newline = block.find(b'\n')
+            if newline < 0:
+                continue
+            block = block[newline + 1:]
+            skip_line = False
+        data = tail + block if tail else block
+        cut = data.rfind(b'\n') + 1
+        if cut:
+            _collect(includes, data, cut)
+            if metrics is not None:
+                metrics.feed(data[:cut])
+        tail = data[cut:]
+        if len(tail) > MAX_LINE_BYTES:
+            tail = b''
+            skip_line = True
+            if metrics is not None:
+                metrics.long_line()
+    if tail:
+        _collect(includes, tail, len(tail))
+        if metrics is not None:
+            metrics.feed(tail)
+    return includes
+
+
+def read_includes(path, metrics=None):
+    """Devuelve (hash, includes) de un archivo en una sola lectura en streaming"""
+    hasher = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        includes = scan_includes(f, hasher, metrics)
+    return hasher.hexdigest(), includes
@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+C-Agent Index: índice consultable de los resultados por archivo (SQLite)
+El reporte solo guarda muestras; el índice guarda todos los archivos y todos
+sus includes, con los índices necesarios para paginar con cursor, filtrar por
+directorio, extensión o cabecera y ordenar en el servidor sin leerlo entero.
+Se escribe en un temporal y se renombra al final, como los reportes, y se lee
+en modo solo lectura con mmap. Si el recorrido no tiene fuentes nuevos respecto
+al índice existente (un ciclo del modo watch) solo se reescriben las filas de los
+archivos modificados, añadidos o borrados, en una transacción sobre el propio índice.
+"""
+
+import os
+import json
+import base64
+import sqlite3
+import tempfile
+import threading
+
+from agent_includes import format_include
+
+INDEX_VERSION = 1
+INDEX_NAME = 'agent_index.sqlite'
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+# Filas de includes que se acumulan antes de cada inserción en bloque
+FLUSH_ROWS = 20000
+# Bytes del índice que SQLite lee por mmap en lugar de con read()
+MMAP_BYTES = 1 << 30
+
+FILE_METRICS = ('lines', 'blank', 'comment', 'code', 'functions', 'longest', 'longest_name')
+FILE_SORTS = ('path', 'size', 'includes', 'lines', 'functions')
+INCLUDE_SORTS = ('header', 'file')
+ORDERS = ('asc', 'desc')
+# Tipo de cada columna de ordenación, para validar los cursores
+KEY_TYPES = {'path': str, 'size': int, 'includes': int, 'lines': int, 'functions': int,
+             'i.header': str, 'i.file_id': int, 'i.position': int}
+
+
+def encode_cursor(values):
+    """Cursor opaco con los valores de ordenación de la última fila de una página"""
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(',', ':')).encode()).decode()
+
+
+def decode_cursor(cursor, types):
+    """Valores de un cursor de encode_cursor, uno por tipo de types (int o str,
+    los de las columnas de ordenación); ValueError si no encajan"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError(f"Cursor inválido: {cursor!r}")
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError(f"Cursor inválido: {cursor!r}")
+    # type() y no isinstance(): True no vale como int
+    if any(type(value) is not kind for value, kind in zip(values, types)):
+        raise ValueError(f"Cursor inválido: {cursor!r}")
+    return values
+
+
+def normalize_directory(directory):
+    """'src', 'src/' o './src' -> './src' (la forma de las rutas del recorrido)"""
+    directory = directory.strip().rstrip('/')
+    if directory in ('', '.'):
+        return '.'
+    return directory if directory.startswith('./') else './' + directory
+
+
+def _prefix_range(prefix):
+    """Límites [inicio, fin) de las cadenas que empiezan por prefix"""
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class IndexWriter:
+    """Construye el índice en streaming durante el análisis.
+
+    add_source recibe cada archivo fuente en el orden del recorrido (en
+    profundidad): así los ids de los fuentes de cada subdirectorio son
+    consecutivos y filtrar sus includes por directorio es un rango de ids.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, self._tmp_path = tempfile.mkstemp(dir=directory, prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+        os.close(fd)
+        self._conn = sqlite3.connect(self._tmp_path)
+        # Es un temporal que se descarta si algo falla: sin diario ni fsync
+        self._conn.execute('PRAGMA journal_mode=OFF')
+        self._conn.execute('PRAGMA synchronous=OFF')
+        self._conn.execute(
+            'CREATE TABLE files ('
+            ' id INTEGER PRIMARY KEY,'
+            ' path TEXT NOT NULL UNIQUE,'
+            ' dir TEXT NOT NULL,'
+            ' ext TEXT NOT NULL,'
+            ' size INTEGER NOT NULL DEFAULT 0,'
+            ' mtime REAL NOT NULL DEFAULT 0,'
+            ' parsed INTEGER NOT NULL DEFAULT 0,'
+            ' includes INTEGER NOT NULL DEFAULT 0,'
+            ' lines INTEGER NOT NULL DEFAULT 0,'
+            ' blank INTEGER NOT NULL DEFAULT 0,'
+            ' comment INTEGER NOT NULL DEFAULT 0,'
+            ' code INTEGER NOT NULL DEFAULT 0,'
+            ' functions INTEGER NOT NULL DEFAULT 0,'
+            ' longest INTEGER NOT NULL DEFAULT 0,'
+            ' longest_name TEXT)'
+        )
+        self._conn.execute(
+            'CREATE TABLE includes ('
+            ' file_id INTEGER NOT NULL,'
+            ' position INTEGER NOT NULL,'
+            ' kind TEXT NOT NULL,'
+            ' header TEXT NOT NULL,'
+            ' PRIMARY KEY (file_id, position)) WITHOUT ROWID'
+        )
+        self._conn.execute(
+            'CREATE TABLE directories ('
+            ' dir TEXT PRIMARY KEY,'
+            ' first_id INTEGER NOT NULL,'
+            ' last_id INTEGER NOT NULL) WITHOUT ROWID'
+        )
+        self._conn.execute('CREATE TABLE meta (key TEXT PRIMARY KEY, value) WITHOUT ROWID')
+        self._next_id = 1
+        self._files = []
+        self._includes = []
+        self._ranges = {}      # directorio -> [primer id, último id] de los fuentes de su subárbol
+        self.files = 0
+        self.include_rows = 0
+
+    def add_source(self, path, includes, metrics):
+        """Un archivo .c/.h con sus includes y métricas (None si no se pudo leer)"""
+        file_id = self._next_id
+        self._next_id += 1
+        directory = os.path.dirname(path)
+        row = [file_id, path, directory, os.path.splitext(path)[1], includes is not None,
+               len(includes) if includes is not None else 0]
+        row.extend(metrics if metrics is not None else (0, 0, 0, 0, 0, 0, None))
+        self._files.append(row)
+        if includes:
+            self._includes.extend((file_id, position, kind, header)
+                                  for position, (kind, header) in enumerate(includes))
+            self.include_rows += len(includes)
+
+        while directory:
+            bounds = self._ranges.get(directory)
+            if bounds is None:
+                self._ranges[directory] = [file_id, file_id]
+            else:
+                bounds[1] = file_id
+            directory = os.path.dirname(directory) if directory != '.' else ''
+
+        if len(self._includes) >= FLUSH_ROWS or len(self._files) >= FLUSH_ROWS:
+            self._flush()
+
+    def _flush(self):
+        self._conn.executemany(
+            'INSERT INTO files (id, path, dir, ext, parsed, includes, lines, blank, comment, code,'
+            ' functions, longest, longest_name) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            self._files
+        )
+        self._conn.executemany('INSERT INTO includes VALUES (?, ?, ?, ?)', self._includes)
+        self._files = []
+        self._includes = []
+
+    def commit(self, entries, metadata=None):
+        """Añade el resto de archivos del recorrido (entries), crea los índices
+        y sustituye de forma atómica el índice anterior"""
+        try:
+            self._flush()
+            # Los fuentes ya están: solo se completan tamaño y mtime
+            self._conn.executemany(
+                'INSERT INTO files (path, dir, ext, size, mtime) VALUES (?, ?, ?, ?, ?)'
+                ' ON CONFLICT (path) DO UPDATE SET size = excluded.size, mtime = excluded.mtime',
+                ((entry.path, os.path.dirname(entry.path), entry.ext, entry.size, entry.mtime)
+                 for entry in entries)
+            )
+            self._conn.executemany('INSERT INTO directories VALUES (?, ?, ?)',
+                                   ((directory, first, last) for directory, (first, last) in self._ranges.items()))
+            # Un índice por ordenación: cada página es un recorrido contiguo desde el cursor
+            self._conn.execute('CREATE INDEX files_ext ON files (ext, path)')
+            for column in FILE_SORTS[1:]:
+                self._conn.execute(f'CREATE INDEX files_{column} ON files ({column}, path)')
+            self._conn.execute('CREATE INDEX includes_header ON includes (header, file_id, position)')
+            self.files = self._conn.execute('SELECT COUNT(*) FROM files').fetchone()[0]
+            meta = dict(metadata or {}, files=self.files, includes=self.include_rows)
+            self._conn.executemany('INSERT INTO meta VALUES (?, ?)', meta.items())
+            self._conn.execute(f'PRAGMA user_version = {INDEX_VERSION}')
+            self._conn.commit()
+            self._conn.close()
+            os.chmod(self._tmp_path, 0o644)
+            os.replace(self._tmp_path, self.path)
+        except BaseException:
+            self.abort()
+            raise
+
+    def abort(self):
+        """Descarta el índice a medio construir; el anterior sigue vigente"""
+        self._conn.close()
+        try:
+            os.unlink(self._tmp_path)
+        except OSError:
+            pass
+
+
+def open_index(path, entries):
+    """IndexUpdate si el índice de path ya tiene todos los fuentes (.c/.h) de
+    entries; si no (o no existe), IndexWriter para construir uno nuevo"""
+    try:
+        conn = sqlite3.connect(f'file:{path}?mode=rw', uri=True)
+    except sqlite3.Error:
+        return IndexWriter(path)
+    try:
+        if conn.execute('PRAGMA user_version').fetchone()[0] == INDEX_VERSION:
+            stored = {path: (file_id, size, mtime)
+                      for path, file_id, size, mtime in conn.execute('SELECT path, id, size, mtime FROM files')}
+            if all(entry.path in stored for entry in entries if entry.ext in ('.c', '.h')):
+                return IndexUpdate(path, conn, stored, entries)
+    except sqlite3.Error:
+        pass
+    conn.close()
+    return IndexWriter(path)
+
+
+class IndexUpdate:
+    """Actualiza en el sitio un índice que ya tiene todos los fuentes del recorrido.
+
+    Los ids de los fuentes (y con ellos los rangos por directorio) no
+    cambian: se reescriben las filas de los archivos cuyo mtime o tamaño
+    cambió y sus includes, se borran las de los archivos que ya no existen
+    (el rango de su directorio queda con un hueco) y se añaden los archivos
+    nuevos que no son fuentes, que no tienen rango. Misma interfaz que
+    IndexWriter; todo se escribe en commit().
+    """
+
+    def __init__(self, path, conn, stored, entries):
+        self.path = path
+        self._conn = conn
+        self._stored = stored          # ruta -> (id, tamaño, mtime) en el índice
+        live = {entry.path for entry in entries}
+        self._removed = [file_id for path, (file_id, _, _) in stored.items() if path not in live]
+        self._stale = [entry for entry in entries
+                       if entry.path not in stored or stored[entry.path][1:] != (entry.size, entry.mtime)]
+        self._stale_paths = {entry.path for entry in self._stale}
+        self._sources = []
+        self.files = len(live)
+        self.include_rows = 0
+        self.updated = 0
+
+    def add_source(self, path, includes, metrics):
+        if path not in self._stale_paths:
+            return
+        row = [includes is not None, len(includes) if includes is not None else 0]
+        row.extend(metrics if metrics is not None else (0, 0, 0, 0, 0, 0, None))
+        self._sources.append((self._stored[path][0], row, includes or ()))
+
+    def commit(self, entries, metadata=None):
+        """Reescribe las filas de los archivos modificados en una sola transacción"""
+        conn = self._conn
+        try:
+            with conn:
+                self.include_rows = conn.execute("SELECT value FROM meta WHERE key = 'includes'").fetchone()[0]
+                for file_id, row, includes in self._sources:
+                    self.include_rows += row[1] - conn.execute('SELECT includes FROM files WHERE id = ?',
+                                                               (file_id,)).fetchone()[0]
+                    conn.execute(
+                        'UPDATE files SET parsed = ?, includes = ?, lines = ?, blank = ?, comment = ?, code = ?,'
+                        ' functions = ?, longest = ?, longest_name = ? WHERE id = ?', row + [file_id]
+                    )
+                    conn.execute('DELETE FROM includes WHERE file_id = ?', (file_id,))
+                    conn.executemany('INSERT INTO includes VALUES (?, ?, ?, ?)',
+                                     ((file_id, position, kind, header)
+                                      for position, (kind, header) in enumerate(includes)))
+                for file_id in self._removed:
+                    self.include_rows -= conn.execute('SELECT includes FROM files WHERE id = ?',
+                                                      (file_id,)).fetchone()[0]
+                    conn.execute('DELETE FROM includes WHERE file_id = ?', (file_id,))
+                    conn.execute('DELETE FROM files WHERE id = ?', (file_id,))
+                conn.executemany(
+                    'INSERT INTO files (path, dir, ext, size, mtime) VALUES (?, ?, ?, ?, ?)'
+                    ' ON CONFLICT (path) DO UPDATE SET size = excluded.size, mtime = excluded.mtime',
+                    ((entry.path, os.path.dirname(entry.path), entry.ext, entry.size, entry.mtime)
+                     for entry in self._stale)
+                )
+                meta = dict(metadata or {}, files=self.files, includes=self.include_rows)
+                conn.executemany('INSERT OR REPLACE INTO meta VALUES (?, ?)', meta.items())
+            self.updated = len(self._stale) + len(self._removed)
+        finally:
+            conn.close()
+
+    def abort(self):
+        """Descarta los cambios; el índice sigue como estaba"""
+        self._conn.close()
+
+
+class ReportIndex:
+    """Consultas paginadas sobre un índice ya escrito (solo lectura, con mmap).
+
+    Las páginas se piden con un cursor (el de la respuesta anterior), no con
+    un desplazamiento: cada página cuesta lo mismo sea cual sea su posición.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True, check_same_thread=False)
+        self._lock = threading.Lock()
+        try:
+            if self._conn.execute('PRAGMA user_version').fetchone()[0] != INDEX_VERSION:
+                raise ValueError(f"Versión de índice no soportada: {path}")
+            self._conn.execute(f'PRAGMA mmap_size = {MMAP_BYTES}')
+            self.meta = dict(self._conn.execute('SELECT key, value FROM meta'))
+        except (sqlite3.Error, ValueError):
+            self._conn.close()
+            raise
+
+    def _page(self, select, where, params, keys, order, cursor, limit):
+        """Una página de select: filas de la consulta seguidas de las columnas de keys"""
+        if order not in ORDERS:
+            raise ValueError(f"Orden desconocido: {order}")
+        limit = max(1, min(int(limit), MAX_LIMIT))
+        where = list(where)
+        params = list(params)
+        if cursor:
+            where.append(f"({', '.join(keys)}) {'>' if order == 'asc' else '<'} ({', '.join('?' * len(keys))})")
+            params.extend(decode_cursor(cursor, [KEY_TYPES[key] for key in keys]))
+        sql = select.replace(' FROM ', f", {', '.join(keys)} FROM ", 1)
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += ' ORDER BY ' + ', '.join(f'{key} {order.upper()}' for key in keys) + ' LIMIT ?'
+        params.append(limit + 1)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        next_cursor = encode_cursor(list(rows[limit - 1][-len(keys):])) if len(rows) > limit else None
+        return [row[:-len(keys)] for row in rows[:limit]], next_cursor
+
+    def _directory_ids(self, directory):
+        """Rango de ids de los fuentes bajo directory (None si no tiene)"""
+        with self._lock:
+            return self._conn.execute('SELECT first_id, last_id FROM directories WHERE dir = ?',
+                                      (normalize_directory(directory),)).fetchone()
+
+    def files(self, directory=None, ext=None, sort='path', order='asc', cursor=None, limit=DEFAULT_LIMIT):
+        """Archivos del recorrido, opcionalmente bajo directory y con extensión ext"""
+        if sort not in FILE_SORTS:
+            raise ValueError(f"Ordenación desconocida: {sort}")
+        where, params = [], []
+        if directory and normalize_directory(directory) != '.':
+            where.append('path >= ? AND path < ?')
+            params.extend(_prefix_range(normalize_directory(directory) + '/'))
+        if ext:
+            where.append('ext = ?')
+            params.append(ext if ext.startswith('.') else '.' + ext)
+        keys = ('path',) if sort == 'path' else (sort, 'path')
+        rows, next_cursor = self._page(
+            'SELECT path, dir, ext, size, mtime, parsed, includes, ' + ', '.join(FILE_METRICS) + ' FROM files',
+            where, params, keys, order, cursor, limit
+        )
+        items = []
+        for path, directory, ext, size, mtime, parsed, includes, *metrics in rows:
+            item = {'path': path, 'dir': directory, 'ext': ext, 'size': size, 'mtime': mtime,
+                    'includes': includes if parsed else None}
+            if parsed:
+                item['metrics'] = dict(zip(FILE_METRICS, metrics))
+            items.append(item)
+        return {'items': items, 'next_cursor': next_cursor, 'sort': sort, 'order': order}
+
+    def includes(self, header=None, header_prefix=None, kind=None, directory=None, path=None,
+                 sort='header', order='asc', cursor=None, limit=DEFAULT_LIMIT):
+        """Includes de los fuentes, filtrados por cabecera (exacta o prefijo),
+        tipo, directorio o archivo.
+
+        sort='header' ordena por cabecera y, dentro de cada una, por el orden
+        del recorrido; sort='file' sigue el orden del recorrido y la posición
+        del include en el archivo.
+        """
+        if sort not in INCLUDE_SORTS:
+            raise ValueError(f"Ordenación desconocida: {sort}")
+        empty = {'items': [], 'next_cursor': None, 'sort': sort, 'order': order}
+        where, params = [], []
+        if header:
+            where.append('i.header = ?')
+            params.append(header)
+        elif header_prefix:
+            where.append('i.header >= ? AND i.header < ?')
+            params.extend(_prefix_range(header_prefix))
+        if kind:
+            where.append('i.kind = ?')
+            params.append(kind)
+        if path:
+            with self._lock:
+                row = self._conn.execute('SELECT id FROM files WHERE path = ?', (path,)).fetchone()
+            if row is None:
+                return empty
+            where.append('i.file_id = ?')
+            params.append(row[0])
+        if directory and normalize_directory(directory) != '.':
+            ids = self._directory_ids(directory)
+            if ids is None:
+                return empty
+            where.append('i.file_id BETWEEN ? AND ?')
+            params.extend(ids)
+        keys = ('i.header', 'i.file_id', 'i.position') if sort == 'header' else ('i.file_id', 'i.position')
+        rows, next_cursor = self._page(
+            'SELECT f.path, i.position, i.kind, i.header FROM includes i JOIN files f ON f.id = i.file_id',
+            where, params, keys, order, cursor, limit
+        )
+        items = [{'file': file_path, 'position': position, 'kind': kind, 'header': header,
+                  'include': format_include(kind, header)}
+                 for file_path, position, kind, header in rows]
+        return dict(empty, items=items, next_cursor=next_cursor)
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
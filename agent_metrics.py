@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+C-Agent Metrics: métricas por archivo de código C
+Líneas físicas, en blanco, de comentario y de código, número de funciones y
+función más larga. Se calculan sobre los mismos bloques que lee el extractor
+de includes (una sola lectura por archivo) con un tokenizador ligero basado en
+expresiones regulares: no es un parser de C, pero acierta en el código habitual.
+"""
+
+import os
+import re
+import heapq
+
+# Comentarios y literales se sustituyen antes de contar, y después las
+# directivas del preprocesador: así '/*' dentro de una cadena o '{' dentro de un
+# comentario o de una macro no confunden al resto del análisis. Los patrones
+# están desenrollados (sin '.*?') y cada alternativa empieza por un literal,
+# para que re salte directamente a los candidatos sin retroceder.
+_STRIP_RE = re.compile(
+    rb'/(?:(/[^\n]*|\*[^*\n]*\*+(?:[^/*\n][^*\n]*\*+)*/)'   # 1: comentario de una línea
+    rb'|(\*[^*]*\*+(?:[^/*][^*]*\*+)*/|\*[\s\S]*))'          # 2: de varias líneas o sin cerrar
+    rb'|"[^"\\\n]*(?:\\.[^"\\\n]*)*"?'
+    rb"|'[^'\\\n]*(?:\\.[^'\\\n]*)*'?"
+)
+# Las directivas de una línea (casi todas) se sustituyen sin llamar a Python;
+# solo las que continúan con '\' necesitan contar sus saltos de línea
+_DIRECTIVE_RE = re.compile(rb'#[^\n\\]*(?=\n|\Z)')
+_CONTINUED_RE = re.compile(rb'#[^\n\\]*(?:\\[\s\S][^\n\\]*)*')
+COMMENT_MARK = b'\x01'
+DIRECTIVE_MARK = b'\x02'
+# Espacios que se eliminan para clasificar líneas: en blanco si queda vacía,
+# de comentario si solo quedan marcas de comentario
+_WHITESPACE = b' \t\r\f\v'
+_BRACE_RE = re.compile(rb'[{}]')
+_NAME_RE = re.compile(rb'[A-Za-z_]\w*$')
+_EXTERN_RE = re.compile(rb'extern\s*""$')
+_SPACE = b' \t\r\n\f\v\x01\x02'
+LOOKBACK_BYTES = 256
+
+# Funciones más largas que se guardan en el reporte
+TOP_FUNCTIONS = 10
+METRIC_FIELDS = ('lines', 'blank', 'comment', 'code', 'functions')
+
+
+def function_name(head):
+    """Nombre de la función si head (el código ante un '{' de nivel superior)
+    termina en una firma 'nombre(...)'; None si es struct, enum o inicializador"""
+    head = head.rstrip(_SPACE)
+    if not head.endswith(b')'):
+        return None
+    depth = 0
+    for index in range(len(head) - 1, -1, -1):
+        char = head[index]
+        if char == 41:      # ')'
+            depth += 1
+        elif char == 40:    # '('
+            depth -= 1
+            if not depth:
+                break
+    else:
+        return None
+    prefix = head[:index].rstrip(_SPACE)
+    name = _NAME_RE.search(prefix, max(0, len(prefix) - 64))
+    return name.group().decode('ascii') if name else None
+
+
+def _mark_lines(mark, text):
+    """Una marca por cada línea de text, conservando el salto final si lo hay"""
+    end = b'\n' if text.endswith(b'\n') else b''
+    return (mark + b'\n') * text.count(b'\n', 0, len(text) - len(end)) + mark + end
+
+
+def _is_extern(head):
+    head = head.rstrip(_SPACE)
+    return head.endswith(b'""') and _EXTERN_RE.search(head, max(0, len(head) - 32)) is not None
+
+
+class SourceMetrics:
+    """Acumulador de métricas de un archivo, alimentado por bloques de líneas completas"""
+
+    __slots__ = ('lines', 'blank', 'comment', 'code', 'functions', 'longest', 'longest_name',
+                 '_pending', '_depth', '_extern', '_start', '_start_name', '_tail')
+
+    def __init__(self):
+        self.lines = self.blank = self.comment = self.code = self.functions = 0
+        self.longest = 0
+        self.longest_name = None
+        self._pending = b''      # comentario o directiva que sigue en el bloque siguiente
+        self._depth = 0          # profundidad de llaves dentro de una función
+        self._extern = 0         # bloques extern "C" { abiertos
+        self._start = None
+        self._start_name = None
+        self._tail = b''         # final del bloque anterior, para ver la firma ante un '{'
+
+    def feed(self, data):
+        """Procesa un bloque de líneas completas (o el final del archivo)"""
+        if not data:
+            return
+        line = self.lines
+        self.lines += data.count(b'\n') + (0 if data.endswith(b'\n') else 1)
+
+        if self._pending:
+            data = self._pending + data
+        self._pending = b''
+
+        def strip(match):
+            kind = match.lastindex
+            if kind == 1:
+                return COMMENT_MARK
+            if kind is None:
+                return b'""'
+            text = match.group()
+            if len(text) < 4 or not text.endswith(b'*/'):
+                # Sigue en el bloque siguiente, que empezará por '/*'
+                self._pending = b'/*'
+            return _mark_lines(COMMENT_MARK, text)
+
+        def directive(match):
+            text = match.group()
+            if text.endswith(b'\\\n'):
+                if match.end() == len(match.string):
+                    # Sigue en el bloque siguiente, que empezará por '#'
+                    self._pending = self._pending or b'#'
+                else:
+                    # Continúa en una línea vacía que termina dentro del bloque:
+                    # se marca igual que si empezara el bloque siguiente
+                    return _mark_lines(DIRECTIVE_MARK, text) + DIRECTIVE_MARK
+            return _mark_lines(DIRECTIVE_MARK, text)
+
+        code = _STRIP_RE.sub(strip, data)
+        code = _DIRECTIVE_RE.sub(DIRECTIVE_MARK, code)
+        if b'#' in code:
+            code = _CONTINUED_RE.sub(directive, code)
+        body = code[:-1] if code.endswith(b'\n') else code
+        compact = body.translate(None, _WHITESPACE)
+        lines = compact.split(b'\n')
+        blank = lines.count(b'')
+        if COMMENT_MARK * 2 in compact:
+            comment = sum(1 for text in lines if text and not text.strip(COMMENT_MARK))
+        else:
+            comment = lines.count(COMMENT_MARK)
+        self.blank += blank
+        self.comment += comment
+        self.code += len(lines) - blank - comment
+
+        self._scan_braces(code, line)
+
+    def long_line(self):
+        """Una línea demasiado larga para analizarla: cuenta como código"""
+        self.lines += 1
+        self.code += 1
+
+    def _scan_braces(self, code, line):
+        # Solo importan las llaves; la firma se mira hacia atrás al abrir un
+        # bloque de nivel superior. Los números de línea se calculan al abrir
+        # y cerrar funciones.
+        tail = self._tail
+        code = tail + code
+        counted = len(tail)
+        self._tail = code[-LOOKBACK_BYTES:]
+
+        def line_at(offset):
+            nonlocal line, counted
+            line += code.count(b'\n', counted, offset)
+            counted = offset
+            return line
+
+        for match in _BRACE_RE.finditer(code, counted):
+            start = match.start()
+            if self._depth:
+                if code[start] == 123:    # '{'
+                    self._depth += 1
+                else:
+                    self._depth -= 1
+                    if not self._depth and self._start is not None:
+                        self._end_function(line_at(start))
+            elif code[start] == 125:      # '}' de nivel superior
+                if self._extern:
+                    self._extern -= 1
+            else:
+                head = code[max(0, start - LOOKBACK_BYTES):start]
+                name = function_name(head)
+                if name is not None:
+                    self._depth = 1
+                    self._start = line_at(start)
+                    self._start_name = name
+                elif _is_extern(head):
+                    self._extern += 1
+                else:
+                    # struct, enum o inicializador: se salta hasta su '}' como un cuerpo sin función
+                    self._depth = 1
+                    self._start = None
+
+    def _end_function(self, line):
+        self.functions += 1
+        length = line - self._start + 1
+        if length > self.longest:
+            self.longest = length
+            self.longest_name = self._start_name
+        self._start = None
+
+    def to_tuple(self):
+        """Forma compacta para la caché y para pasar entre procesos"""
+        return (self.lines, self.blank, self.comment, self.code, self.functions,
+                self.longest, self.longest_name)
+
+
+class MetricsAggregate:
+    """Totales por directorio y funciones más largas del proyecto, en streaming"""
+
+    def __init__(self, top=TOP_FUNCTIONS):
+        self.top = top
+        self.totals = dict.fromkeys(('files',) + METRIC_FIELDS, 0)
+        self.directories = {}
+        self._longest = []   # heap (líneas, archivo, función)
+
+    def add(self, path, metrics):
+        lines, blank, comment, code, functions, longest, longest_name = metrics
+        directory = os.path.dirname(path)
+        bucket = self.directories.get(directory)
+        if bucket is None:
+            bucket = self.directories[directory] = dict.fromkeys(('files',) + METRIC_FIELDS, 0)
+        for totals in (self.totals, bucket):
+            totals['files'] += 1
+            totals['lines'] += lines
+            totals['blank'] += blank
+            totals['comment'] += comment
+            totals['code'] += code
+            totals['functions'] += functions
+        if longest:
+            item = (longest, path, longest_name or '?')
+            if len(self._longest) < self.top:
+                heapq.heappush(self._longest, item)
+            elif item > self._longest[0]:
+                heapq.heapreplace(self._longest, item)
+
+    def to_report(self):
+        return {
+            'totals': self.totals,
+            'directories': dict(sorted(self.directories.items())),
+            'longest_functions': [
+                {'file': path, 'function': name, 'lines': lines}
+                for lines, path, name in sorted(self._longest, reverse=True)
+            ],
+        }
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+C-Agent Profile: instrumentación del análisis
+Spans por fase (y opcionalmente por archivo), contadores de E/S y errores, y
+modos opcionales cProfile / tracemalloc. Todo se exporta al reporte JSON.
+"""
+
+import time
+import heapq
+import tracemalloc
+import contextlib
+from collections import Counter
+
+PROFILE_MODES = ('cprofile', 'tracemalloc')
+MAX_ERRORS = 100
+
+
+class Instrumentation:
+    def __init__(self, profile=None, trace_files=False, slowest_files=20, top_functions=25):
+        if profile not in (None,) + PROFILE_MODES:
+            raise ValueError(f"Modo de perfilado desconocido: {profile}")
+        self.profile = profile
+        self.trace_files = trace_files
+        self.slowest_files = slowest_files
+        self.top_functions = top_functions
+        self.spans = {}
+        self.counters = Counter()
+        self.errors = []
+        self._files = []      # heap (segundos, ruta) con los archivos más lentos
+        self._stack = []      # spans abiertos: [nombre, inicio, pico de memoria]
+        self._profiler = None
+        self._profile_report = None
+
+    # --- Spans -----------------------------------------------------------
+
+    @contextlib.contextmanager
+    def span(self, name):
+        """Mide un bloque; los spans anidados se nombran 'padre/hijo'"""
+        if self._stack:
+            name = f"{self._stack[-1][0]}/{name}"
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            self._push_peak()
+        frame = [name, time.perf_counter(), 0]
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            span = self.spans.setdefault(name, {'seconds': 0.0, 'count': 0})
+            span['seconds'] += time.perf_counter() - frame[1]
+            span['count'] += 1
+            if tracing:
+                peak = max(frame[2], tracemalloc.get_traced_memory()[1])
+                span['peak_bytes'] = max(span.get('peak_bytes', 0), peak)
+                if self._stack:
+                    self._stack[-1][2] = max(self._stack[-1][2], peak)
+                tracemalloc.reset_peak()
+
+    def _push_peak(self):
+        # Antes de reiniciar el pico, se lo apunta al span que lo contiene
+        if self._stack:
+            self._stack[-1][2] = max(self._stack[-1][2], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+
+    def record_file(self, path, seconds):
+        """Tiempo de análisis de un archivo; solo se guardan los más lentos"""
+        if not self.trace_files:
+            return
+        item = (seconds, path)
+        if len(self._files) < self.slowest_files:
+            heapq.heappush(self._files, item)
+        elif item > self._files[0]:
+            heapq.heapreplace(self._files, item)
+
+    # --- Contadores y errores -------------------------------------------
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def error(self, where, exc):
+        """Registra un error en lugar de descartarlo en silencio"""
+        self.counters['errors'] += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append({'where': where, 'error': str(exc)})
+
+    # --- Perfiladores ----------------------------------------------------
+
+    def start(self):
+        if self.profile == 'cprofile':
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif self.profile == 'tracemalloc' and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stop(self):
+        if self.profile == 'cprofile' and self._profiler is not None:
+            import pstats
+            self._profiler.disable()
+            stats = pstats.Stats(self._profiler)
+            rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+            self._profile_report = [
+                {
+                    'function': f"{filename}:{line}({func})",
+                    'calls': calls,
+                    'total_seconds': round(total, 6),
+                    'cumulative_seconds': round(cumulative, 6),
+                }
+                for (filename, line, func), (_, calls, total, cumulative, _) in rows[:self.top_functions]
+            ]
+            self._profiler = None
+        elif self.profile == 'tracemalloc' and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            self._profile_report = [
+                {'location': str(stat.traceback), 'size_bytes': stat.size, 'blocks': stat.count}
+                for stat in snapshot.statistics('lineno')[:self.top_functions]
+            ]
+            tracemalloc.stop()
+
+    # --- Exportación -----------------------------------------------------
+
+    def to_report(self):
+        report = {
+            'spans': {
+                name: dict(span, seconds=round(span['seconds'], 6))
+                for name, span in self.spans.items()
+            },
+            'counters': dict(self.counters),
+            'errors': self.errors,
+        }
+        if self.trace_files:
+            report['slowest_files'] = [
+                {'file': path, 'seconds': round(seconds, 6)}
+                for seconds, path in sorted(self._files, reverse=True)
+            ]
+        if self.profile:
+            report['profile'] = {'mode': self.profile, 'top': self._profile_report or []}
+        return report
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+C-Agent Report: escritura y lectura de reportes
+Escritura atómica (archivo temporal + rename) para que un lector concurrente
+nunca vea un reporte a medias, y formatos JSON indentado, JSON compacto o
+NDJSON (un registro por línea), opcionalmente comprimidos con gzip.
+"""
+
+import os
+import io
+import json
+import contextlib
+
+REPORT_FORMATS = ('json', 'compact', 'ndjson')
+REPORT_NAME = 'agent_analysis'
+COMPACT_SEPARATORS = (',', ':')
+
+
+def report_filename(fmt='json', compress=False):
+    """Nombre del reporte según el formato: agent_analysis.json, .ndjson, .json.gz..."""
+    name = REPORT_NAME + ('.ndjson' if fmt == 'ndjson' else '.json')
+    return name + '.gz' if compress else name
+
+
+def report_candidates(directory):
+    """Rutas posibles del reporte en directory, en todos los formatos"""
+    return [os.path.join(directory, report_filename(fmt, compress))
+            for fmt in ('json', 'ndjson') for compress in (False, True)]
+
+
+def find_report(directory):
+    """El reporte más reciente en directory (cualquier formato) o None"""
+    newest = None
+    for path in report_candidates(directory):
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            continue
+        if newest is None or mtime > newest[0]:
+            newest = (mtime, path)
+    return newest[1] if newest else None
+
+
+def remove_other_reports(path):
+    """Borra los reportes de otros formatos que queden junto a path.
+
+    Al cambiar de formato el anterior se quedaría desactualizado junto al
+    nuevo, y quien lo abra por su nombre leería datos antiguos.
+    """
+    for candidate in report_candidates(os.path.dirname(path) or '.'):
+        if candidate != path:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(candidate)
+
+
+@contextlib.contextmanager
+def atomic_write(path, compress=False):
+    """Abre un archivo de texto que sustituye a path solo al cerrarse sin errores.
+
+    Se escribe en un temporal del mismo directorio y se renombra con
+    os.replace: los lectores ven el reporte anterior o el nuevo, nunca uno
+    a medias. Con compress=True el contenido se escribe comprimido (gzip).
+    """
+    import gzip
+    import tempfile
+    
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+    try:
+        with open(fd, 'wb') as raw:
+            binary = gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6, mtime=0) if compress else raw
+            with io.TextIOWrapper(binary, encoding='utf-8', write_through=False) as f:
+                yield f
+        try:
+            mode = os.stat(path).st_mode & 0o777
+        except OSError:
+            mode = 0o644
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_path)
+        raise
+
+
+class RecordSpool:
+    """Registros NDJSON escritos según se generan, en un temporal junto al reporte.
+
+    La cabecera del reporte (totales, grafo) solo se conoce al final: los
+    registros por archivo esperan en disco en lugar de en memoria y
+    write_report los copia tras ella. close() borra el temporal.
+    """
+
+    def __init__(self, directory):
+        import tempfile
+        
+        os.makedirs(directory, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(dir=directory, prefix=f'.{REPORT_NAME}.records.', suffix='.tmp')
+        self._file = open(fd, 'w+', encoding='utf-8')
+        self.count = 0
+
+    def add(self, record):
+        self._file.write(json.dumps(record, separators=COMPACT_SEPARATORS))
+        self._file.write('\n')
+        self.count += 1
+
+    def copy_to(self, f):
+        """Escribe en f todos los registros añadidos hasta ahora"""
+        import shutil
+        
+        self._file.flush()
+        self._file.seek(0)
+        shutil.copyfileobj(self._file, f)
+        self._file.seek(0, os.SEEK_END)
+
+    def close(self):
+        self._file.close()
+        with contextlib.suppress(OSError):
+            os.unlink(self.path)
+
+
+def write_report(path, report, records=(), fmt='json', compress=False):
+    """Escribe el reporte de forma atómica y en streaming.
+
+    En NDJSON la primera línea es report (con 'record': 'report') y cada
+    elemento de records (o cada registro de un RecordSpool) va en su propia
+    línea, de modo que los registros (uno por archivo) se escriben y se
+    leen sin tenerlos todos en memoria.
+    En JSON solo se escribe report.
+    """
+    if fmt not in REPORT_FORMATS:
+        raise ValueError(f"Formato de reporte desconocido: {fmt}")
+    with atomic_write(path, compress=compress) as f:
+        if fmt == 'ndjson':
+            f.write(json.dumps(dict(report, record='report'), separators=COMPACT_SEPARATORS))
+            f.write('\n')
+            if isinstance(records, RecordSpool):
+                records.copy_to(f)
+            else:
+                for record in records:
+                    f.write(json.dumps(record, separators=COMPACT_SEPARATORS))
+                    f.write('\n')
+        elif fmt == 'compact':
+            json.dump(report, f, separators=COMPACT_SEPARATORS)
+        else:
+            # Una sola escritura: json.dump con indent escribe cada fragmento por separado
+            f.write(json.dumps(report, indent=2))
+
+
+def open_report(path):
+    """Abre un reporte como texto, descomprimiéndolo si termina en .gz"""
+    if path.endswith('.gz'):
+        import gzip
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+
+def iter_records(path):
+    """Genera los registros de un reporte: uno por línea en NDJSON, el único
+    objeto en JSON"""
+    with open_report(path) as f:
+        if '.ndjson' in os.path.basename(path):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield json.load(f)
+
+
+def read_report(path):
+    """Cabecera del reporte (resumen, grafo, instrumentación) sin leer los
+    registros por archivo de un NDJSON"""
+    with contextlib.closing(iter_records(path)) as records:
+        for record in records:
+            record.pop('record', None)
+            return record
+    raise ValueError(f"Reporte vacío: {path}")
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+C-Agent Scanner: recorrido único del árbol del proyecto
+Un solo pase con os.scandir que clasifica cada archivo (extensión, tamaño, mtime)
+"""
+
+import os
+import sys
+
+# Directorios que nunca se recorren salvo que se indique otra cosa
+DEFAULT_PRUNE_DIRS = ('.git',)
+
+
+class ScanEntry:
+    """Un archivo del recorrido.
+
+    Con __slots__ y sin guardar el nombre (se deriva de la ruta): en árboles
+    con millones de archivos cada entrada ocupa lo mínimo. La extensión se
+    interna, así que todas las entradas '.c' comparten la misma cadena.
+    """
+
+    __slots__ = ('path', 'ext', 'size', 'mtime')
+
+    def __init__(self, path, ext, size, mtime):
+        self.path = path
+        self.ext = sys.intern(ext)
+        self.size = size
+        self.mtime = mtime
+
+    @property
+    def name(self):
+        return os.path.basename(self.path)
+
+    def __repr__(self):
+        return f"ScanEntry(path={self.path!r}, size={self.size}, mtime={self.mtime})"
+
+    @classmethod
+    def from_stat(cls, path, st):
+        return cls(path, os.path.splitext(path)[1], st.st_size, st.st_mtime)
+
+
+def normalize_prune_dirs(prune_dirs):
+    """Normaliza la lista de directorios a podar ('build/' -> 'build')"""
+    if prune_dirs is None:
+        prune_dirs = DEFAULT_PRUNE_DIRS
+    return frozenset(d.strip().rstrip('/').rstrip(os.sep) for d in prune_dirs if d.strip())
+
+
+def is_pruned(rel, prune):
+    """True si el directorio rel ('./src/build') está podado por nombre o por ruta"""
+    return os.path.basename(rel) in prune or rel[2:] in prune
+
+
+def scan_order_key(path):
+    """Clave que reproduce el orden de scan_tree: archivos de un directorio
+    por nombre y después sus subdirectorios, también por nombre."""
+    parts = path.split(os.sep)[1:]
+    return tuple((1, part) for part in parts[:-1]) + ((0, parts[-1]),)
+
+
+def scan_tree(root='.', prune_dirs=None, start='.'):
+    """Recorre el árbol una sola vez y genera un ScanEntry por archivo regular.
+
+    Las rutas de las entradas son relativas a root con el prefijo './'
+    ('./src/main.c'), sin depender del directorio de trabajo del proceso.
+    prune_dirs acepta nombres de directorio ('build') o rutas relativas a la
+    raíz ('src/third_party'); ambos se descartan sin descender en ellos.
+    start limita el recorrido a un subdirectorio ('./src') sin cambiar la
+    forma de las rutas.
+    """
+    prune = normalize_prune_dirs(prune_dirs)
+    stack = [(os.path.join(root, start[2:]) if start != '.' else root, start)]
+
+    while stack:
+        current, current_rel = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+
+        subdirs = []
+        for entry in entries:
+            rel = os.path.join(current_rel, entry.name)
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if is_pruned(rel, prune):
+                        continue
+                    subdirs.append((entry.path, rel))
+                elif entry.is_file():
+                    yield ScanEntry.from_stat(rel, entry.stat())
+            except OSError:
+                continue
+
+        # Orden de recorrido estable: los subdirectorios se visitan en orden alfabético
+        stack.extend(reversed(subdirs))
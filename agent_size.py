@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+C-Agent Size: tamaño del proyecto en disco
+Un lstat por entrada (os.scandir + DirEntry.stat), enlaces duros contados una
+sola vez por (st_dev, st_ino), tamaño aparente y bloques asignados por
+directorio, y subárboles recorridos en paralelo con hilos: en un sistema de
+archivos en red casi todo el tiempo es latencia de stat, que los hilos solapan.
+"""
+
+import os
+import stat
+import queue
+
+from agent_scanner import normalize_prune_dirs, is_pruned
+
+DEFAULT_THREADS = 8
+DEFAULT_DEPTH = 1
+# st_blocks se mide siempre en unidades de 512 bytes, sea cual sea el bloque del sistema de archivos
+BLOCK_BYTES = 512
+SIZE_FIELDS = ('files', 'apparent_bytes', 'allocated_bytes', 'sparse_files')
+
+
+def _size_directory(path, rel, prune):
+    """Tamaños de los archivos de un directorio (sin descender) y sus subdirectorios.
+
+    Devuelve (rel, contadores de SIZE_FIELDS, enlazados, subdirectorios,
+    errores). Los archivos con más de un enlace duro no se suman aquí: van en
+    enlazados como ((st_dev, st_ino), aparente, asignado) para contarlos una
+    sola vez al final.
+    """
+    counts = [0] * len(SIZE_FIELDS)
+    linked = []
+    subdirs = []
+    errors = 0
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        sub = os.path.join(rel, entry.name)
+                        if not is_pruned(sub, prune):
+                            subdirs.append((entry.path, sub))
+                        continue
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    errors += 1
+                    continue
+                # Solo archivos regulares: los enlaces simbólicos no se siguen
+                if not stat.S_ISREG(st.st_mode):
+                    continue
+                blocks = getattr(st, 'st_blocks', None)
+                allocated = st.st_size if blocks is None else blocks * BLOCK_BYTES
+                if st.st_nlink > 1:
+                    linked.append(((st.st_dev, st.st_ino), st.st_size, allocated))
+                else:
+                    _add_file(counts, st.st_size, allocated)
+    except OSError:
+        errors += 1
+    return rel, counts, linked, subdirs, errors
+
+
+def _walk(root, prune, threads):
+    """Genera el resultado de _size_directory de cada directorio del árbol"""
+    if threads <= 1:
+        stack = [(root, '.')]
+        while stack:
+            result = _size_directory(*stack.pop(), prune)
+            stack.extend(result[3])
+            yield result
+        return
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    # Los hilos dejan sus resultados en una cola y este hilo encola los
+    # subdirectorios que van apareciendo: no hay que esperar por futuros
+    results = queue.SimpleQueue()
+
+    def task(path, rel):
+        try:
+            results.put(_size_directory(path, rel, prune))
+        except BaseException as e:
+            results.put(e)
+
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix='agent-size') as pool:
+        pool.submit(task, root, '.')
+        outstanding = 1
+        while outstanding:
+            result = results.get()
+            outstanding -= 1
+            if isinstance(result, BaseException):
+                raise result
+            for path, rel in result[3]:
+                pool.submit(task, path, rel)
+                outstanding += 1
+            yield result
+
+
+def _add_file(counts, apparent, allocated):
+    counts[0] += 1
+    counts[1] += apparent
+    counts[2] += allocated
+    # Disperso (o comprimido por el sistema de archivos): ocupa menos de lo que mide
+    if allocated < apparent:
+        counts[3] += 1
+
+
+def _depth(rel):
+    return 0 if rel == '.' else rel.count(os.sep)
+
+
+def size_tree(root='.', prune_dirs=None, threads=DEFAULT_THREADS, depth=DEFAULT_DEPTH):
+    """Tamaño de los archivos regulares bajo root, en total y por directorio.
+
+    Cada directorio de la respuesta acumula su subárbol (como du) y se
+    incluyen los de profundidad <= depth ('.' es 0; None = todos). Un archivo
+    con varios enlaces duros dentro del árbol cuenta una vez, en el primero de
+    sus directorios por orden de ruta, de modo que el resultado no depende del
+    orden en que terminan los hilos. apparent_bytes es st_size y
+    allocated_bytes, lo que ocupa en disco (st_blocks): menor en archivos
+    dispersos o comprimidos (sparse_files), mayor por el redondeo a bloques.
+    """
+    prune = normalize_prune_dirs(prune_dirs)
+    own = {}
+    linked = []
+    errors = 0
+    directories = 0
+    for rel, counts, links, _, dir_errors in _walk(root, prune, threads):
+        directories += 1
+        errors += dir_errors
+        own[rel] = counts
+        linked.extend((rel, key, apparent, allocated) for key, apparent, allocated in links)
+
+    seen = set()
+    hardlinks = 0
+    for rel, key, apparent, allocated in sorted(linked):
+        if key in seen:
+            hardlinks += 1
+            continue
+        seen.add(key)
+        _add_file(own[rel], apparent, allocated)
+
+    # Cada directorio suma lo suyo a todos sus antecesores hasta la raíz
+    cumulative = {}
+    for rel, counts in own.items():
+        current = rel
+        while True:
+            if depth is None or _depth(current) <= depth:
+                bucket = cumulative.get(current)
+                if bucket is None:
+                    bucket = cumulative[current] = [0] * len(SIZE_FIELDS)
+                for index, value in enumerate(counts):
+                    bucket[index] += value
+            if current == '.':
+                break
+            current = os.path.dirname(current)
+
+    totals = dict(zip(SIZE_FIELDS, cumulative.get('.', [0] * len(SIZE_FIELDS))))
+    totals.update({'directories': directories, 'hardlinks_skipped': hardlinks, 'errors': errors})
+    return {
+        'totals': totals,
+        'directories': {rel: dict(zip(SIZE_FIELDS, counts)) for rel, counts in sorted(cumulative.items())},
+    }
+
+
+def format_bytes(size):
+    """Tamaño legible: 512 B, 3.40 KB, 1.25 GB..."""
+    for unit in ('B', 'KB', 'MB', 'GB', 'TB'):
+        if size < 1024 or unit == 'TB':
+            return f"{size} {unit}" if unit == 'B' else f"{size:.2f} {unit}"
+        size /= 1024
@@ -2,124 +2,468 @@
 """
 C-Agent Task: Análisis completo del proyecto
 Tarea sencilla para demostrar las capacidades del agente
+
+Se invoca desde hooks de git y del editor: en el nivel de módulo solo se
+importa lo que necesita cualquier subcomando; caché (sqlite3), parser de
+includes, grafo, pool de procesos y escritura de reportes se cargan al usarse.
 """
 
 import os
-import subprocess
-import json
+import time
+import argparse
+import itertools
+from collections import namedtuple
 from datetime import datetime
 
+from agent_scanner import scan_tree, scan_order_key, is_pruned, normalize_prune_dirs, ScanEntry, DEFAULT_PRUNE_DIRS
+from agent_profile import Instrumentation, PROFILE_MODES
+
+ParseResult = namedtuple('ParseResult', ['digest', 'includes', 'metrics', 'error', 'seconds'])
+
+# Muestras que guarda el reporte; el resto solo se cuenta
+FILES_SAMPLE = 5
+INCLUDES_SAMPLE = 10
+# Archivos analizados por tanda: acota la memoria de parse_sources en árboles enormes
+PARSE_WINDOW = 8192
+
+def parse_source(path):
+    """Lee y analiza un archivo fuente; se ejecuta también en los procesos del pool.
+
+    Includes y métricas de código salen de la misma lectura. Devuelve un
+    ParseResult; si el archivo no se puede leer, includes es None y error
+    describe el motivo.
+    """
+    from agent_includes import read_includes
+    from agent_metrics import SourceMetrics
+    
+    start = time.perf_counter()
+    metrics = SourceMetrics()
+    try:
+        digest, includes = read_includes(path, metrics)
+        return ParseResult(digest, includes, metrics.to_tuple(), None, time.perf_counter() - start)
+    except OSError as e:
+        return ParseResult(None, None, None, str(e), time.perf_counter() - start)
+
+def file_record(path, includes, metrics, resolves_to):
+    """Registro NDJSON de un archivo fuente: includes tal como aparecen y
+    archivos del proyecto a los que resuelven"""
+    from agent_includes import format_include
+    from agent_metrics import METRIC_FIELDS
+    
+    record = {'record': 'file', 'path': path, 'includes': None, 'resolves_to': resolves_to}
+    if metrics is not None:
+        record['metrics'] = dict(zip(METRIC_FIELDS, metrics))
+        record['metrics']['longest_function'] = {'name': metrics[6], 'lines': metrics[5]}
+    if includes is not None:
+        record['includes'] = [format_include(kind, header) for kind, header in includes]
+    return record
+
 class SimpleAgentTask:
-    def __init__(self):
-        self.project_path = "/Users/carteaga/Projects/Agentes_C"
+    def __init__(self, prune_dirs=DEFAULT_PRUNE_DIRS, use_cache=True, jobs=1, include_paths=(),
+                 project_path=None, profile=None, trace_files=False, executor=None, verbose=True,
+                 report_format='json', compress_reports=False, history=True, index_reports=True,
+                 header_index=False, headers_path=None):
+        # Raíz del proyecto: todas las rutas se resuelven contra ella, nunca contra el cwd
+        self.project_path = os.path.abspath(project_path or '.')
+        # Pool de procesos compartido (modo batch); si no, se crea uno por análisis
+        self.executor = executor
+        self.verbose = verbose
+        self.prune_dirs = prune_dirs
+        self.include_paths = include_paths
+        self.graph = None
+        self.report_format = report_format
+        self.compress_reports = compress_reports
+        self.history = history
+        # Índice consultable con todos los archivos e includes (API paginada del dashboard)
+        self.index_reports = index_reports
+        # Índice invertido de cabeceras compartido por todos los proyectos: escribe fuera
+        # del proyecto (~/.c-agent), así que solo la CLI lo activa. headers_path None = ruta por defecto
+        self.header_index = header_index
+        self.headers_path = headers_path
+        self.use_cache = use_cache
+        # Caché abierta entre ejecuciones (modo watch); si no, se abre una por análisis
+        self.cache = None
+        # Modo watch: includes y grafo se conservan en memoria entre análisis
+        self.incremental = False
+        self._parsed = {}    # ruta -> (mtime, tamaño, includes, métricas), solo en modo incremental
+        self._headers = None   # última actualización escrita del índice de cabeceras, solo en modo incremental
+        self.jobs = jobs or os.cpu_count() or 1
         self.results = {}
+        self.instrumentation = Instrumentation(profile=profile, trace_files=trace_files)
+        self._entries = None
         
-    def run_simple_analysis(self):
-        """Ejecuta un análisis sencillo del proyecto"""
-        print("🚀 C-Agent ejecutando tarea sencilla...")
-        print("=" * 50)
+    @property
+    def cache_path(self):
+        return os.path.join(self.project_path, 'reports', '.cache')
+    
+    @property
+    def history_path(self):
+        return os.path.join(self.project_path, 'reports', 'history.sqlite')
+    
+    @property
+    def report_path(self):
+        from agent_report import report_filename
+        return os.path.join(self.project_path, 'reports', report_filename(self.report_format, self.compress_reports))
+    
+    @property
+    def index_path(self):
+        from agent_index import INDEX_NAME
+        return os.path.join(self.project_path, 'reports', INDEX_NAME)
+    
+    def check_project_path(self):
+        """FileNotFoundError si la raíz del proyecto no es un directorio"""
+        if not os.path.isdir(self.project_path):
+            raise FileNotFoundError(f"No existe el directorio del proyecto: {self.project_path}")
+    
+    def scan(self):
+        """Recorre el proyecto una sola vez y reutiliza las entradas en cada análisis"""
+        if self._entries is None:
+            self.check_project_path()
+            with self.instrumentation.span('scan'):
+                self._entries = list(scan_tree(self.project_path, self.prune_dirs))
+            self.instrumentation.count('files_scanned', len(self._entries))
+        return self._entries
+    
+    def apply_changes(self, paths):
+        """Prepara un nuevo análisis actualizando solo las rutas cambiadas (modo watch).
+
+        Cada ruta ('./src/a.c') se vuelve a consultar: si es un archivo se
+        reemplaza su entrada, si es un directorio se recorre solo ese
+        subárbol y si ya no existe se eliminan sus entradas. paths=None
+        descarta el recorrido y fuerza uno completo.
+        """
+        if paths is None or self._entries is None:
+            self._entries = None
+        else:
+            prune = normalize_prune_dirs(self.prune_dirs)
+            index = {entry.path: entry for entry in self._entries}
+            known = set(index)
+            for rel in paths:
+                if index.pop(rel, None) is None:
+                    prefix = rel + os.sep
+                    for path in [path for path in index if path.startswith(prefix)]:
+                        del index[path]
+                full_path = os.path.join(self.project_path, rel)
+                try:
+                    if os.path.isdir(full_path) and not os.path.islink(full_path):
+                        if not is_pruned(rel, prune):
+                            index.update((entry.path, entry) for entry in scan_tree(self.project_path, prune, start=rel))
+                    elif os.path.isfile(full_path):
+                        st = os.stat(full_path)
+                        index[rel] = ScanEntry.from_stat(rel, st)
+                except OSError:
+                    continue
+            if known.issuperset(index):
+                # Sin rutas nuevas el orden del recorrido no cambia
+                self._entries = [index[entry.path] for entry in self._entries if entry.path in index]
+            else:
+                self._entries = sorted(index.values(), key=lambda entry: scan_order_key(entry.path))
         
-        # 1. Análisis de archivos
-        print("📊 Analizando estructura de archivos...")
-        self.analyze_files()
+        self.results = {}
+        if not self.incremental:
+            self.graph = None
+        self.instrumentation = Instrumentation(profile=self.instrumentation.profile,
+                                               trace_files=self.instrumentation.trace_files)
+        if self.cache is not None:
+            self.cache.hits = self.cache.misses = 0
+    
+    def log(self, message):
+        if self.verbose:
+            print(message)
+    
+    def run_simple_analysis(self, progress=None):
+        """Ejecuta un análisis sencillo del proyecto.
+
+        progress, si se indica, se llama como progress(paso, total, mensaje)
+        al comenzar cada fase.
+        """
+        if progress is None:
+            progress = lambda step, total, message: None
+        span = self.instrumentation.span
+        # Sin raíz no hay nada que analizar, y los reportes crearían su directorio
+        self.check_project_path()
         
-        # 2. Análisis de dependencias
-        print("🔍 Analizando dependencias...")
-        self.analyze_dependencies()
+        self.log("🚀 C-Agent ejecutando tarea sencilla...")
+        self.log("=" * 50)
+        
+        # El perfilador cubre las fases de análisis; el reporte ya lo incluye
+        index = headers = records = None
+        self.instrumentation.start()
+        try:
+            # 1. Análisis de archivos
+            self.log("📊 Analizando estructura de archivos...")
+            progress(0, 4, 'Analizando estructura de archivos')
+            with span('analyze_files'):
+                self.analyze_files()
+            
+            # Los temporales del índice y de los registros NDJSON se crean
+            # después del recorrido, que así no los ve. Con los mismos archivos
+            # que el índice anterior (modo watch) solo se actualizan los cambiados
+            if self.index_reports:
+                from agent_index import open_index
+                index = open_index(self.index_path, self.scan())
+            if self.report_format == 'ndjson':
+                from agent_report import RecordSpool
+                records = RecordSpool(os.path.dirname(self.report_path))
+            headers = self.begin_header_index()
+            
+            # 2. Análisis de dependencias
+            self.log("🔍 Analizando dependencias...")
+            progress(1, 4, 'Analizando dependencias')
+            with span('analyze_dependencies'):
+                self.analyze_dependencies([sink for sink in (index, headers) if sink is not None], records)
+        except BaseException:
+            if index is not None:
+                index.abort()
+            if records is not None:
+                records.close()
+            if headers is not None:
+                headers.index.close()
+            raise
+        finally:
+            self.instrumentation.stop()
         
         # 3. Generación de reporte
-        print("📝 Generando reporte...")
-        self.generate_report()
+        self.log("📝 Generando reporte...")
+        progress(2, 4, 'Generando reporte')
+        with span('generate_report'):
+            try:
+                self.generate_report(records)
+            except BaseException:
+                if index is not None:
+                    index.abort()
+                raise
+            finally:
+                if records is not None:
+                    records.close()
+            if index is not None:
+                self.write_index(index)
         
         # 4. Creación de resumen
-        print("📋 Creando resumen ejecutivo...")
-        self.create_summary()
+        self.log("📋 Creando resumen ejecutivo...")
+        progress(3, 4, 'Creando resumen ejecutivo')
+        with span('create_summary'):
+            self.create_summary()
+        if self.history:
+            self.record_history()
+        if headers is not None:
+            self.update_header_index(headers)
+        progress(4, 4, 'Completado')
+        self.results['instrumentation'] = self.instrumentation.to_report()
         
-        print("✅ Tarea completada exitosamente!")
+        self.log("✅ Tarea completada exitosamente!")
         return self.results
     
     def analyze_files(self):
         """Analiza la estructura de archivos del proyecto"""
         try:
-            os.chdir(self.project_path)
-            
-            # Contar archivos por tipo
+            # Contar archivos por tipo (solo contadores y una muestra acotada)
+            counts = {'.c': 0, '.h': 0, '.py': 0}
             c_files = []
-            h_files = []
-            py_files = []
             
-            for root, dirs, files in os.walk('.'):
-                for file in files:
-                    if file.endswith('.c'):
-                        c_files.append(os.path.join(root, file))
-                    elif file.endswith('.h'):
-                        h_files.append(os.path.join(root, file))
-                    elif file.endswith('.py'):
-                        py_files.append(os.path.join(root, file))
+            for entry in self.scan():
+                if entry.ext in counts:
+                    counts[entry.ext] += 1
+                    if entry.ext == '.c' and len(c_files) < FILES_SAMPLE:
+                        c_files.append(entry.path)
             
             self.results['files'] = {
-                'c_files': len(c_files),
-                'h_files': len(h_files),
-                'py_files': len(py_files),
-                'total_files': len(c_files) + len(h_files) + len(py_files),
-                'c_files_list': c_files[:5],  # Primeros 5 archivos
+                'c_files': counts['.c'],
+                'h_files': counts['.h'],
+                'py_files': counts['.py'],
+                'total_files': sum(counts.values()),
+                'c_files_list': c_files,  # Primeros 5 archivos
                 'project_size': self.get_project_size()
             }
             
-            print(f"   📁 Archivos C: {len(c_files)}")
-            print(f"   📁 Archivos H: {len(h_files)}")
-            print(f"   📁 Archivos Python: {len(py_files)}")
+            self.log(f"   📁 Archivos C: {counts['.c']}")
+            self.log(f"   📁 Archivos H: {counts['.h']}")
+            self.log(f"   📁 Archivos Python: {counts['.py']}")
             
         except Exception as e:
-            print(f"❌ Error analizando archivos: {e}")
+            self.log(f"❌ Error analizando archivos: {e}")
+            self.instrumentation.error('analyze_files', e)
             self.results['files'] = {'error': str(e)}
     
-    def analyze_dependencies(self):
-        """Analiza las dependencias del proyecto"""
+    def analyze_dependencies(self, sinks=(), records=None):
+        """Analiza las dependencias del proyecto.
+
+        Cada elemento de sinks (IndexWriter o IndexUpdate, HeaderIndexUpdate) recibe con
+        add_source(ruta, includes, métricas) cada archivo fuente leído, y
+        records (un RecordSpool, reporte NDJSON) su registro por archivo.
+        """
+        from agent_cache import AnalysisCache
+        from agent_includes import format_include, SYSTEM, LOCAL
+        from agent_graph import IncludeGraph, IncrementalIncludeGraph
+        from agent_metrics import MetricsAggregate
+        
         try:
-            # Buscar includes en archivos C
-            includes = []
+            # Buscar includes en archivos C: agregación en streaming, los includes
+            # de cada archivo se cuentan, pasan al grafo y se descartan
+            total_includes = 0
             system_includes = 0
             local_includes = 0
+            includes = []
+            sources = [entry.path for entry in self.scan() if entry.ext in ('.c', '.h')]
+            source_paths = set(sources)
             
-            for root, dirs, files in os.walk('.'):
-                for file in files:
-                    if file.endswith('.c') or file.endswith('.h'):
-                        filepath = os.path.join(root, file)
-                        try:
-                            with open(filepath, 'r') as f:
-                                content = f.read()
-                                lines = content.split('\n')
-                                for line in lines:
-                                    if line.strip().startswith('#include'):
-                                        includes.append({
-                                            'file': filepath,
-                                            'include': line.strip()
-                                        })
-                                        if '<' in line and '>' in line:
-                                            system_includes += 1
-                                        elif '"' in line:
-                                            local_includes += 1
-                        except:
-                            continue
+            # Métricas de código (líneas, funciones) por directorio, de la misma lectura
+            code_metrics = MetricsAggregate()
+            # Grafo de dependencias: ciclos y cabeceras que más recompilaciones provocan.
+            # En modo incremental se reutiliza y solo se actualizan los archivos cambiados
+            if self.incremental:
+                graph = (self.graph or IncrementalIncludeGraph(self.include_paths)).sync_nodes(sources)
+            else:
+                graph = IncludeGraph(self.include_paths).add_nodes(sources)
+            cache = self.cache
+            owns_cache = cache is None and self.use_cache
+            if owns_cache:
+                cache = AnalysisCache(self.cache_path)
+            try:
+                for path, file_includes, file_metrics in self.parse_sources(cache):
+                    for sink in sinks:
+                        sink.add_source(path, file_includes, file_metrics)
+                    if self.incremental:
+                        node = graph.set_file(path, file_includes)
+                    elif file_includes is not None:
+                        node = graph.add_file(path, file_includes)
+                    if records is not None:
+                        resolves_to = [graph.nodes[target] for target in graph.adjacency[node]] if file_includes is not None else []
+                        records.add(file_record(path, file_includes, file_metrics, resolves_to))
+                    if file_includes is None:
+                        continue
+                    if file_metrics is not None:
+                        code_metrics.add(path, file_metrics)
+                    total_includes += len(file_includes)
+                    for kind, header in file_includes:
+                        if len(includes) < INCLUDES_SAMPLE:
+                            includes.append({
+                                'file': path,
+                                'include': format_include(kind, header)
+                            })
+                        if kind == SYSTEM:
+                            system_includes += 1
+                        elif kind == LOCAL:
+                            local_includes += 1
+                if cache is not None:
+                    cache.save(live_paths=source_paths)
+            finally:
+                if owns_cache:
+                    cache.close()
+            if self.incremental:
+                for path in [path for path in self._parsed if path not in source_paths]:
+                    del self._parsed[path]
+                with self.instrumentation.span('include_graph'):
+                    graph.refresh()
             
             self.results['dependencies'] = {
-                'total_includes': len(includes),
+                'total_includes': total_includes,
                 'system_includes': system_includes,
                 'local_includes': local_includes,
-                'includes_list': includes[:10]  # Primeros 10 includes
+                'includes_list': includes  # Primeros 10 includes
             }
+            if cache is not None:
+                self.results['dependencies']['cache'] = {'hits': cache.hits, 'misses': cache.misses}
+            
+            self.results['code_metrics'] = code_metrics.to_report()
+            self.graph = graph
+            with self.instrumentation.span('include_graph'):
+                self.results['include_graph'] = graph.to_report()
             
-            print(f"   🔍 Total includes: {len(includes)}")
-            print(f"   🔍 System includes: {system_includes}")
-            print(f"   🔍 Local includes: {local_includes}")
+            self.log(f"   🔍 Total includes: {total_includes}")
+            self.log(f"   🔍 System includes: {system_includes}")
+            self.log(f"   🔍 Local includes: {local_includes}")
+            if cache is not None:
+                self.log(f"   💾 Caché: {cache.hits} sin cambios, {cache.misses} reanalizados")
+            totals = self.results['code_metrics']['totals']
+            self.log(f"   📏 Código: {totals['lines']} líneas ({totals['code']} de código, "
+                     f"{totals['comment']} de comentarios, {totals['blank']} en blanco), "
+                     f"{totals['functions']} funciones")
+            graph = self.results['include_graph']
+            self.log(f"   🕸️  Grafo: {graph['nodes']} archivos, {graph['edges']} aristas, {len(graph['cycles'])} ciclos")
             
         except Exception as e:
-            print(f"❌ Error analizando dependencias: {e}")
+            self.log(f"❌ Error analizando dependencias: {e}")
+            self.instrumentation.error('analyze_dependencies', e)
             self.results['dependencies'] = {'error': str(e)}
     
-    def generate_report(self):
-        """Genera un reporte de análisis"""
+    def parse_sources(self, cache=None):
+        """Genera (ruta, includes, métricas) por cada .c/.h en el orden del recorrido.
+
+        Los archivos vigentes en la caché no se leen; el resto se analiza en
+        serie o repartido en un pool de self.jobs procesos. El resultado se
+        combina siempre en el orden del recorrido, igual que una ejecución serie.
+        Se trabaja por tandas de PARSE_WINDOW archivos, así que la memoria no
+        crece con el tamaño del árbol. En modo incremental los resultados se
+        conservan en memoria y los archivos sin cambios no pasan por la caché.
+        """
+        inst = self.instrumentation
+        parsed_memo = self._parsed if self.incremental else None
+        sources = (entry for entry in self.scan() if entry.ext in ('.c', '.h'))
+        pool = self.executor
+        owns_pool = False
+        try:
+            while True:
+                window = list(itertools.islice(sources, PARSE_WINDOW))
+                if not window:
+                    break
+                results = {}
+                pending = []
+                with inst.span('cache_lookup'):
+                    for entry in window:
+                        if parsed_memo is not None:
+                            kept = parsed_memo.get(entry.path)
+                            if kept is not None and kept[0] == entry.mtime and kept[1] == entry.size:
+                                results[entry.path] = kept[2:]
+                                if cache is not None:
+                                    cache.hits += 1
+                                continue
+                        cached = cache.get(entry) if cache is not None else None
+                        if cached is not None and cached[1] is not None:
+                            results[entry.path] = cached
+                            if parsed_memo is not None:
+                                parsed_memo[entry.path] = (entry.mtime, entry.size) + tuple(cached)
+                        else:
+                            pending.append(entry)
+                inst.count('files_skipped', len(window) - len(pending))
+                
+                paths = [os.path.join(self.project_path, entry.path) for entry in pending]
+                with inst.span('parse'):
+                    if pool is None and self.jobs > 1 and len(paths) > 1:
+                        from concurrent.futures import ProcessPoolExecutor
+                        pool = ProcessPoolExecutor(max_workers=self.jobs)
+                        owns_pool = True
+                    if pool is not None and len(paths) > 1:
+                        chunksize = max(1, len(paths) // (self.jobs * 4))
+                        parsed = list(pool.map(parse_source, paths, chunksize=chunksize))
+                    else:
+                        parsed = [parse_source(path) for path in paths]
+                
+                for entry, result in zip(pending, parsed):
+                    inst.record_file(entry.path, result.seconds)
+                    if result.error is not None:
+                        inst.error(entry.path, result.error)
+                        results[entry.path] = (None, None)
+                        continue
+                    inst.count('files_opened')
+                    inst.count('bytes_read', entry.size)
+                    if cache is not None:
+                        cache.put(entry, result.digest, result.includes, result.metrics)
+                    results[entry.path] = (result.includes, result.metrics)
+                    if parsed_memo is not None:
+                        parsed_memo[entry.path] = (entry.mtime, entry.size, result.includes, result.metrics)
+                
+                for entry in window:
+                    file_includes, file_metrics = results[entry.path]
+                    yield entry.path, file_includes, file_metrics
+        finally:
+            if owns_pool:
+                pool.shutdown()
+    
+    def generate_report(self, records=None):
+        """Genera un reporte de análisis (con records, un RecordSpool, en NDJSON)"""
+        from agent_report import write_report, remove_other_reports
+        
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
         report = {
@@ -137,19 +481,75 @@ class SimpleAgentTask:
                 ]
             }
         }
+        if 'code_metrics' in self.results:
+            report['code_metrics'] = self.results['code_metrics']
+        if 'include_graph' in self.results:
+            report['include_graph'] = self.results['include_graph']
+            if self.report_format == 'ndjson':
+                # La adyacencia va en los registros por archivo, no en la cabecera
+                report['include_graph'] = {k: v for k, v in report['include_graph'].items() if k != 'adjacency'}
+        report['instrumentation'] = self.instrumentation.to_report()
         
-        # Guardar reporte
-        report_path = os.path.join(self.project_path, 'reports', 'agent_analysis.json')
-        os.makedirs(os.path.dirname(report_path), exist_ok=True)
-        
-        with open(report_path, 'w') as f:
-            json.dump(report, f, indent=2)
+        # Guardar reporte (escritura atómica: el dashboard nunca lee uno a medias)
+        report_path = self.report_path
+        write_report(report_path, report, records or (), fmt=self.report_format, compress=self.compress_reports)
+        remove_other_reports(report_path)
         
         self.results['report_path'] = report_path
-        print(f"   📝 Reporte guardado en: {report_path}")
+        self.log(f"   📝 Reporte guardado en: {report_path}")
+    
+    def write_index(self, index):
+        """Completa y publica el índice de archivos e includes (reports/agent_index.sqlite).
+
+        Si el análisis de dependencias falló se descarta y el dashboard sigue
+        sirviendo el índice anterior.
+        """
+        if 'error' in self.results.get('dependencies', {}) or 'dependencies' not in self.results:
+            index.abort()
+            return
+        try:
+            with self.instrumentation.span('index'):
+                index.commit(self.scan(), {'timestamp': time.time(), 'project': self.project_path})
+            self.results['index_path'] = index.path
+            self.log(f"   🗂️  Índice guardado en: {index.path} ({index.files} archivos, {index.include_rows} includes)")
+        except Exception as e:
+            self.log(f"❌ Error escribiendo el índice: {e}")
+            self.instrumentation.error('write_index', e)
+    
+    def begin_header_index(self):
+        """Actualización del índice de cabeceras entre proyectos para este
+        análisis, o None si está desactivado o no se puede abrir"""
+        if not self.header_index:
+            return None
+        from agent_headers import HeaderIndex
+        try:
+            return HeaderIndex(self.headers_path).begin(self.project_path, self.scan(),
+                                                         self._headers if self.incremental else None)
+        except Exception as e:
+            self.instrumentation.error('header_index', e)
+            return None
+    
+    def update_header_index(self, update):
+        """Escribe en el índice de cabeceras los archivos nuevos, modificados o borrados"""
+        try:
+            dependencies = self.results.get('dependencies')
+            if dependencies is not None and 'error' not in dependencies:
+                with self.instrumentation.span('header_index'):
+                    update.commit()
+                if self.incremental:
+                    self._headers = update
+                self.log(f"   🔎 Índice de cabeceras: {update.updated} archivos actualizados, "
+                         f"{update.removed} eliminados ({update.index.path})")
+        except Exception as e:
+            self.log(f"❌ Error actualizando el índice de cabeceras: {e}")
+            self.instrumentation.error('header_index', e)
+        finally:
+            update.index.close()
     
     def create_summary(self):
         """Crea un resumen ejecutivo"""
+        from agent_report import atomic_write
+        
         summary = {
             'tarea': 'Análisis completo del proyecto C-Agent',
             'fecha': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
@@ -170,7 +570,7 @@ class SimpleAgentTask:
         
         # Guardar resumen
         summary_path = os.path.join(self.project_path, 'reports', 'task_summary.md')
-        with open(summary_path, 'w') as f:
+        with atomic_write(summary_path) as f:
             f.write(f"# Resumen de Tarea C-Agent\n\n")
             f.write(f"**Fecha:** {summary['fecha']}\n\n")
             f.write(f"**Tarea:** {summary['tarea']}\n\n")
@@ -182,27 +582,134 @@ class SimpleAgentTask:
                 f.write(f"- {step}\n")
         
         self.results['summary'] = summary
-        print(f"   📋 Resumen guardado en: {summary_path}")
+        self.log(f"   📋 Resumen guardado en: {summary_path}")
+    
+    def record_history(self):
+        """Añade las métricas de esta ejecución al histórico (reports/history.sqlite)"""
+        from agent_history import HistoryStore, run_metrics
+        try:
+            project_size = self.project_size_bytes()
+            with HistoryStore(self.history_path) as store:
+                store.record(run_metrics(self.results, self.instrumentation, project_size))
+        except Exception as e:
+            self.instrumentation.error('record_history', e)
+    
+    def project_size_bytes(self):
+        """Suma de los tamaños de los archivos del recorrido"""
+        return sum(entry.size for entry in self.scan())
     
     def get_project_size(self):
         """Calcula el tamaño del proyecto"""
         try:
-            total_size = 0
-            for root, dirs, files in os.walk('.'):
-                for file in files:
-                    filepath = os.path.join(root, file)
-                    if os.path.isfile(filepath):
-                        total_size += os.path.getsize(filepath)
+            total_size = self.project_size_bytes()
             return f"{total_size / 1024:.2f} KB"
-        except:
+        except Exception as e:
+            self.instrumentation.error('get_project_size', e)
             return "Unknown"
 
-def main():
+COMMANDS = ('report', 'files', 'deps', 'size', 'headers', 'daily')
+
+def parse_args(argv=None):
+    """Opciones de línea de comandos"""
+    from agent_report import REPORT_FORMATS
+    from agent_size import DEFAULT_THREADS, DEFAULT_DEPTH
+    
+    parser = argparse.ArgumentParser(description='C-Agent: análisis del proyecto')
+    parser.add_argument('command', nargs='?', choices=COMMANDS, default='report',
+                        help='report: análisis completo con reportes (por defecto); files, deps, size: '
+                             'consultas rápidas sin escribir reportes; headers: uso de cabeceras en todos los '
+                             'proyectos analizados; daily: chequeo diario con daily_summary.md')
+    parser.add_argument('--json', action='store_true',
+                        help='En files, deps, size y headers, escribir el resultado como JSON en la salida estándar')
+    parser.add_argument('--root', default='.',
+                        help='Raíz del proyecto a analizar (por defecto, el directorio actual)')
+    parser.add_argument('--prune', action='append', metavar='DIR',
+                        help="Directorio a excluir del recorrido (repetible, p. ej. --prune build --prune third_party)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Ignorar la caché incremental (reports/.cache) y releer todos los archivos')
+    parser.add_argument('-j', '--jobs', type=int, default=1, metavar='N',
+                        help='Procesos para analizar los archivos en paralelo (0 = todos los núcleos)')
+    parser.add_argument('-I', '--include-path', action='append', metavar='DIR',
+                        help='Ruta de búsqueda de includes relativa al proyecto (repetible)')
+    parser.add_argument('--threads', type=int, default=DEFAULT_THREADS, metavar='N',
+                        help='En size, hilos que recorren subárboles en paralelo')
+    parser.add_argument('--depth', type=int, default=DEFAULT_DEPTH, metavar='N',
+                        help='En size, profundidad del desglose por directorio (-1 = todos)')
+    parser.add_argument('--header', metavar='HEADER',
+                        help='En headers, listar los archivos de todos los proyectos que incluyen HEADER')
+    parser.add_argument('--header-prefix', metavar='PREFIX',
+                        help='En headers, listar los que incluyen cualquier cabecera que empiece por PREFIX')
+    parser.add_argument('--kind', choices=('system', 'local', 'macro'),
+                        help='En headers, solo los includes de este tipo')
+    parser.add_argument('--project', metavar='DIR',
+                        help='En headers, solo los archivos de este proyecto')
+    parser.add_argument('--prune-project', action='append', metavar='DIR',
+                        help='En headers, eliminar del índice el proyecto DIR si su raíz ya no existe (repetible)')
+    parser.add_argument('--top', type=int, default=20, metavar='N',
+                        help='En headers, número de cabeceras más incluidas o de archivos listados')
+    parser.add_argument('--headers-db', metavar='FILE',
+                        help='Índice de cabeceras entre proyectos (por defecto $C_AGENT_HEADERS o ~/.c-agent/headers.sqlite)')
+    parser.add_argument('--no-header-index', action='store_true',
+                        help='No actualizar el índice de cabeceras entre proyectos')
+    parser.add_argument('--impact', metavar='HEADER',
+                        help='Listar los archivos .c que se recompilan si cambia HEADER')
+    parser.add_argument('--profile', choices=PROFILE_MODES,
+                        help='Perfilar el análisis con cProfile o tracemalloc (resultado en el reporte)')
+    parser.add_argument('--trace-files', action='store_true',
+                        help='Medir el tiempo por archivo e incluir los más lentos en el reporte')
+    parser.add_argument('--report-format', choices=REPORT_FORMATS, default='json',
+                        help='Formato del reporte: JSON indentado, JSON compacto o NDJSON (un registro por archivo)')
+    parser.add_argument('--compress', action='store_true',
+                        help='Comprimir el reporte con gzip (agent_analysis.json.gz / .ndjson.gz)')
+    parser.add_argument('--no-index', action='store_true',
+                        help='No escribir el índice de archivos e includes (reports/agent_index.sqlite)')
+    parser.add_argument('--no-history', action='store_true',
+                        help='No añadir las métricas de esta ejecución al histórico (reports/history.sqlite)')
+    parser.add_argument('--watch', action='store_true',
+                        help='Seguir ejecutándose y reanalizar solo los archivos que cambien')
+    parser.add_argument('--poll', action='store_true',
+                        help='En modo watch, sondear mtimes en lugar de usar inotify')
+    parser.add_argument('--poll-interval', type=float, default=0.5, metavar='SECONDS',
+                        help='Intervalo de sondeo en modo watch sin inotify')
+    parser.add_argument('--batch', nargs='+', metavar='DIR',
+                        help='Analizar varios proyectos en un solo proceso con un reporte consolidado')
+    parser.add_argument('--batch-file', metavar='FILE',
+                        help='Archivo con las rutas de los proyectos del lote (una por línea)')
+    parser.add_argument('--batch-workers', type=int, default=4, metavar='N',
+                        help='Proyectos analizados a la vez en modo batch')
+    parser.add_argument('--batch-report', default=os.path.join('reports', 'batch_analysis.json'),
+                        help='Ruta del reporte consolidado del lote')
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Función principal para ejecutar la tarea"""
+    args = parse_args(argv)
+    prune_dirs = DEFAULT_PRUNE_DIRS + tuple(args.prune or ())
+    
+    if args.batch or args.batch_file:
+        return main_batch(args, prune_dirs)
+    
+    agent = SimpleAgentTask(prune_dirs=prune_dirs, use_cache=not args.no_cache, jobs=args.jobs,
+                            include_paths=args.include_path or (), profile=args.profile,
+                            trace_files=args.trace_files, project_path=args.root,
+                            report_format=args.report_format, compress_reports=args.compress,
+                            history=not args.no_history, index_reports=not args.no_index,
+                            header_index=not args.no_header_index, headers_path=args.headers_db)
+    if args.command == 'headers':
+        return main_headers(args)
+    try:
+        agent.check_project_path()
+    except FileNotFoundError as e:
+        raise SystemExit(f"❌ {e}")
+    if args.command in ('files', 'deps', 'size'):
+        return main_query(args, agent)
+    if args.command == 'daily':
+        return main_daily(args, agent)
+    if args.watch:
+        return main_watch(args, agent)
+    
     print("🤖 C-Agent ejecutando tarea sencilla...")
     print("=" * 50)
-    
-    agent = SimpleAgentTask()
     results = agent.run_simple_analysis()
     
     print("\n" + "=" * 50)
@@ -215,7 +722,177 @@ def main():
     print(f"📋 Resumen guardado en: reports/task_summary.md")
     print("=" * 50)
     
+    if args.impact:
+        print_impact(agent, args.impact)
+    
+    return results
+
+def print_impact(agent, header):
+    """Archivos .c que se recompilan si cambia header"""
+    if agent.graph is None:
+        return
+    impacted = agent.graph.impacted_sources(header)
+    if impacted is None:
+        print(f"❌ {header} no está en el grafo de dependencias")
+    else:
+        print(f"🔁 {len(impacted)} archivos .c se recompilan si cambia {header}:")
+        for path in impacted:
+            print(f"   {path}")
+
+def main_query(args, agent):
+    """Subcomandos files, deps y size: solo la fase pedida y sin escribir reportes"""
+    agent.verbose = not args.json
+    if args.command == 'files':
+        agent.analyze_files()
+        result = agent.results['files']
+    elif args.command == 'deps':
+        agent.analyze_dependencies()
+        graph = agent.results.get('include_graph', {})
+        result = {
+            'dependencies': agent.results['dependencies'],
+            'include_graph': {k: v for k, v in graph.items() if k != 'adjacency'},
+        }
+        if args.impact and agent.graph is not None:
+            result['impacted_sources'] = agent.graph.impacted_sources(args.impact)
+    else:
+        from agent_size import size_tree, format_bytes
+        
+        depth = None if args.depth < 0 else args.depth
+        result = size_tree(agent.project_path, agent.prune_dirs, threads=args.threads, depth=depth)
+        totals = result['totals']
+        result['project_size'] = f"{totals['apparent_bytes'] / 1024:.2f} KB"
+        result['bytes'] = totals['apparent_bytes']
+        agent.log(f"   💾 Tamaño del proyecto: {format_bytes(totals['apparent_bytes'])} "
+                  f"({format_bytes(totals['allocated_bytes'])} en disco), {totals['files']} archivos")
+        if totals['hardlinks_skipped'] or totals['sparse_files']:
+            agent.log(f"   🔗 {totals['hardlinks_skipped']} enlaces duros contados una vez, "
+                      f"{totals['sparse_files']} archivos dispersos")
+        for rel, size in result['directories'].items():
+            if rel != '.':
+                agent.log(f"   {format_bytes(size['allocated_bytes']):>12}  {rel}")
+    
+    if args.json:
+        import json
+        print(json.dumps(result, indent=2))
+    elif args.command == 'deps' and args.impact:
+        print_impact(agent, args.impact)
+    return result
+
+def main_headers(args):
+    """Subcomando headers: consultas al índice de cabeceras de todos los proyectos analizados"""
+    import sqlite3
+    from agent_headers import HeaderIndex
+    
+    if args.prune_project:
+        try:
+            store = HeaderIndex(args.headers_db)
+            with store:
+                pruned = store.prune(args.prune_project)
+        except sqlite3.Error as e:
+            raise SystemExit(f"❌ {e}")
+        if args.json:
+            import json
+            print(json.dumps({'pruned': pruned}, indent=2))
+        else:
+            print(f"🧹 {len(pruned)} de {len(args.prune_project)} proyectos eliminados del índice de cabeceras")
+            for path in pruned:
+                print(f"   {path}")
+        return {'pruned': pruned}
+    
+    try:
+        store = HeaderIndex(args.headers_db, readonly=True)
+    except sqlite3.Error:
+        print("❌ Aún no hay índice de cabeceras: ejecuta antes un análisis (agent_task.py report)")
+        return None
+    with store:
+        if args.header or args.header_prefix:
+            result = store.who_includes(args.header, args.header_prefix, project=args.project,
+                                        kind=args.kind, limit=args.top)
+        else:
+            result = {'projects': store.projects(), 'top_headers': store.top_headers(args.kind, args.top)}
+    
+    if args.json:
+        import json
+        print(json.dumps(result, indent=2))
+    elif args.header or args.header_prefix:
+        total = result.get('total', len(result['items']))
+        print(f"🔎 {total} archivos incluyen {args.header or args.header_prefix + '*'}:")
+        for item in result['items']:
+            print(f"   {item['project']}: {item['file']}  ({item['include']})")
+        if result['next_cursor']:
+            print(f"   ... (usa --top para ver más)")
+    else:
+        print(f"🔎 {len(result['projects'])} proyectos indexados; cabeceras más incluidas:")
+        for item in result['top_headers']:
+            print(f"   {item[args.kind or 'files']:>8}  {item['header']}")
+    return result
+
+def main_daily(args, agent):
+    """Chequeo diario: un único análisis y el resumen diario generado con sus resultados"""
+    from agent_daily import write_daily_summary
+    
+    print(f"🚀 C-Agent Daily Check - {datetime.now().strftime('%a %b %d %H:%M:%S %Y')}")
+    print("=" * 41)
+    print("📊 Running quick analysis...")
+    results = agent.run_simple_analysis()
+    
+    print("📈 Checking current status...")
+    print(f"   Files analyzed: {results.get('files', {}).get('c_files', 0)} C files")
+    print(f"   Dependencies: {results.get('dependencies', {}).get('total_includes', 0)} includes")
+    
+    print("📋 Creating daily summary...")
+    summary_path = write_daily_summary(results, agent.project_path)
+    
+    print("✅ Daily check completed!")
+    print(f"📊 Dashboard: file://{os.path.join(agent.project_path, 'dashboard.html')}")
+    print(f"📋 Summary: {summary_path}")
     return results
 
+def main_watch(args, agent):
+    """Modo watch: análisis inicial completo y reanálisis incremental en cada cambio"""
+    from agent_watch import watch
+    
+    def on_update(agent, changes, seconds):
+        counters = agent.instrumentation.counters
+        if changes is None:
+            what = "Análisis completo"
+        else:
+            what = f"{len(changes)} cambios"
+        print(f"🔄 [{datetime.now().strftime('%H:%M:%S')}] {what}: "
+              f"{counters['files_opened']} archivos reanalizados, "
+              f"{agent.results.get('files', {}).get('total_files', 0)} en total ({seconds:.2f}s)")
+    
+    try:
+        watch(agent, poll=args.poll, poll_interval=args.poll_interval, on_update=on_update)
+    except KeyboardInterrupt:
+        print("\n🛑 Modo watch detenido")
+    return agent.results
+
+def main_batch(args, prune_dirs):
+    """Modo batch: varios proyectos, un proceso y un reporte consolidado"""
+    from agent_batch import run_batch, read_project_list
+    
+    roots = list(args.batch or [])
+    if args.batch_file:
+        roots.extend(read_project_list(args.batch_file))
+    
+    print(f"🤖 C-Agent analizando {len(roots)} proyectos...")
+    print("=" * 50)
+    report = run_batch(roots, jobs=args.jobs, concurrency=args.batch_workers,
+                       report_path=args.batch_report, prune_dirs=prune_dirs,
+                       use_cache=not args.no_cache, include_paths=args.include_path or (),
+                       header_index=not args.no_header_index, headers_path=args.headers_db)
+    
+    for project in report['projects']:
+        files = project['files']
+        print(f"   📁 {project['project']}: {files.get('total_files', 0)} archivos, "
+              f"{project['dependencies'].get('total_includes', 0)} includes ({project['seconds']:.2f}s)")
+    totals = report['totals']
+    print("=" * 50)
+    print(f"✅ {totals['projects']} proyectos analizados en {report['seconds']:.2f}s "
+          f"({totals['projects_with_errors']} con errores)")
+    print(f"📝 Reporte consolidado: {report['report_path']}")
+    return report
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+C-Agent Watch: análisis continuo del proyecto
+Detecta cambios con inotify (ctypes, Linux) o, si no está disponible, con un
+sondeo de mtimes indexado por directorio, y reanaliza solo lo que cambió.
+"""
+
+import os
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+
+from agent_cache import AnalysisCache
+from agent_scanner import normalize_prune_dirs, is_pruned
+
+DEFAULT_POLL_INTERVAL = 0.5
+# Tras el primer cambio se esperan más durante este tiempo (guardados en ráfaga, git checkout)
+DEBOUNCE_SECONDS = 0.1
+MAX_DEBOUNCE_SECONDS = 1.0
+# Los reportes se escriben dentro del proyecto: vigilarlos provocaría un bucle
+IGNORED_DIRS = ('./reports',)
+
+# Constantes de <sys/inotify.h>
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = (IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR | IN_DONT_FOLLOW)
+EVENT_HEADER = struct.Struct('iIII')
+
+
+def _watched_dirs(root, rel, prune, ignored):
+    """Directorios (relativos a root) a vigilar bajo rel, sin los podados"""
+    stack = [rel]
+    while stack:
+        current = stack.pop()
+        yield current
+        try:
+            with os.scandir(os.path.join(root, current[2:]) if current != '.' else root) as it:
+                for entry in it:
+                    sub = os.path.join(current, entry.name)
+                    if entry.is_dir(follow_symlinks=False) and not is_pruned(sub, prune) and sub not in ignored:
+                        stack.append(sub)
+        except OSError:
+            continue
+
+
+class InotifyWatcher:
+    """Un watch de inotify por directorio; los directorios nuevos se añaden al vuelo"""
+
+    def __init__(self, root, prune_dirs=None, ignored=IGNORED_DIRS):
+        self.root = root
+        self.prune = normalize_prune_dirs(prune_dirs)
+        self.ignored = frozenset(ignored)
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1')
+        self._dirs = {}    # wd -> directorio relativo
+        try:
+            self._add_tree('.')
+        except OSError:
+            self.close()
+            raise
+
+    def _add_tree(self, rel):
+        for directory in _watched_dirs(self.root, rel, self.prune, self.ignored):
+            path = os.path.join(self.root, directory[2:]) if directory != '.' else self.root
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+            if wd < 0:
+                error = ctypes.get_errno()
+                if error in (errno.ENOENT, errno.ENOTDIR):
+                    continue  # Borrado mientras se recorría
+                # ENOSPC: límite fs.inotify.max_user_watches alcanzado
+                raise OSError(error, os.strerror(error), path)
+            self._dirs[wd] = directory
+
+    def wait(self, timeout=None):
+        """Rutas cambiadas desde la última llamada (conjunto vacío si se agota
+        el timeout) o None si se perdieron eventos y hay que recorrer todo."""
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed = set()
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    return None
+                directory = self._dirs.get(wd)
+                if mask & IN_IGNORED:
+                    self._dirs.pop(wd, None)
+                if directory is None:
+                    continue
+                if not name:
+                    # Evento sobre el propio directorio vigilado (borrado o movido)
+                    if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                        changed.add(directory)
+                    continue
+                rel = os.path.join(directory, name)
+                if mask & IN_ISDIR:
+                    if is_pruned(rel, self.prune) or rel in self.ignored:
+                        continue
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        self._add_tree(rel)
+                changed.add(rel)
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingWatcher:
+    """Sondeo de mtimes: solo se relee un directorio cuando cambia su propio
+    mtime (altas y bajas); los archivos conocidos se comprueban con stat."""
+
+    def __init__(self, root, prune_dirs=None, ignored=IGNORED_DIRS, interval=DEFAULT_POLL_INTERVAL):
+        self.root = root
+        self.prune = normalize_prune_dirs(prune_dirs)
+        self.ignored = frozenset(ignored)
+        self.interval = interval
+        self._dirs = {}     # directorio relativo -> (mtime_ns, nombres)
+        self._files = {}    # archivo relativo -> (mtime_ns, tamaño)
+        self._index_tree('.')
+
+    def _full(self, rel):
+        return os.path.join(self.root, rel[2:]) if rel != '.' else self.root
+
+    def _index_tree(self, rel):
+        for directory in _watched_dirs(self.root, rel, self.prune, self.ignored):
+            self._index_dir(directory)
+
+    def _index_dir(self, directory):
+        try:
+            mtime = os.stat(self._full(directory)).st_mtime_ns
+            with os.scandir(self._full(directory)) as it:
+                entries = list(it)
+        except OSError:
+            return
+        for entry in entries:
+            try:
+                if entry.is_file(follow_symlinks=False):
+                    st = entry.stat(follow_symlinks=False)
+                    self._files[os.path.join(directory, entry.name)] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                continue
+        self._dirs[directory] = (mtime, frozenset(entry.name for entry in entries))
+
+    def _forget(self, rel):
+        prefix = rel + os.sep
+        self._files.pop(rel, None)
+        for index in (self._dirs, self._files):
+            for path in [path for path in index if path == rel or path.startswith(prefix)]:
+                del index[path]
+
+    def poll(self):
+        """Un pase de sondeo; devuelve las rutas cambiadas"""
+        changed = set()
+        for directory, (mtime, names) in list(self._dirs.items()):
+            if directory not in self._dirs:
+                continue  # Olvidado en este mismo pase junto con su padre
+            try:
+                current = os.stat(self._full(directory)).st_mtime_ns
+            except OSError:
+                self._forget(directory)
+                changed.add(directory)
+                continue
+            if current == mtime:
+                continue
+            self._index_dir(directory)
+            new_names = self._dirs.get(directory, (None, frozenset()))[1]
+            for name in new_names - names:
+                rel = os.path.join(directory, name)
+                if os.path.isdir(self._full(rel)) and not os.path.islink(self._full(rel)):
+                    if is_pruned(rel, self.prune) or rel in self.ignored:
+                        continue
+                    self._index_tree(rel)
+                changed.add(rel)
+            for name in names - new_names:
+                rel = os.path.join(directory, name)
+                self._forget(rel)
+                changed.add(rel)
+        for path, signature in list(self._files.items()):
+            try:
+                st = os.stat(self._full(path))
+            except OSError:
+                self._files.pop(path, None)
+                changed.add(path)
+                continue
+            if (st.st_mtime_ns, st.st_size) != signature:
+                self._files[path] = (st.st_mtime_ns, st.st_size)
+                changed.add(path)
+        return changed
+
+    def wait(self, timeout=None):
+        """Sondea hasta encontrar cambios o agotar el timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = self.poll()
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            delay = self.interval if deadline is None else min(self.interval, max(0, deadline - time.monotonic()))
+            time.sleep(delay)
+
+    def close(self):
+        pass
+
+
+def create_watcher(root, prune_dirs=None, poll=False, poll_interval=DEFAULT_POLL_INTERVAL):
+    """inotify si está disponible; si no (otro SO, límite de watches), sondeo"""
+    if not poll:
+        try:
+            return InotifyWatcher(root, prune_dirs)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(root, prune_dirs, interval=poll_interval)
+
+
+def collect_changes(watcher, timeout=None):
+    """Espera un cambio y agrupa los que llegan justo después (None = recorrer todo)"""
+    changed = watcher.wait(timeout)
+    if not changed:
+        return changed
+    deadline = time.monotonic() + MAX_DEBOUNCE_SECONDS
+    while time.monotonic() < deadline:
+        more = watcher.wait(DEBOUNCE_SECONDS)
+        if more is None:
+            return None
+        if not more:
+            break
+        changed |= more
+    return changed
+
+
+def watch(agent, poll=False, poll_interval=DEFAULT_POLL_INTERVAL, on_update=None):
+    """Análisis completo inicial y después un reanálisis incremental por cada cambio.
+
+    Los reportes (reports/agent_analysis.json) se reescriben en cada ciclo y
+    on_update(agent, changes, seconds) se llama tras cada uno. Termina con
+    Ctrl+C (KeyboardInterrupt).
+    """
+    if agent.use_cache:
+        agent.cache = AnalysisCache(agent.cache_path)
+    agent.incremental = True
+    watcher = None
+    try:
+        # El watcher (y la foto inicial del sondeo) se crea antes del análisis
+        # inicial: lo que cambie mientras dura llega en el primer ciclo
+        agent.check_project_path()
+        watcher = create_watcher(agent.project_path, agent.prune_dirs, poll, poll_interval)
+        start = time.perf_counter()
+        agent.run_simple_analysis()
+        if on_update is not None:
+            on_update(agent, None, time.perf_counter() - start)
+        agent.log(f"👀 Vigilando {agent.project_path} ({type(watcher).__name__})...")
+        while True:
+            changes = collect_changes(watcher)
+            if changes is not None and not changes:
+                continue
+            start = time.perf_counter()
+            agent.apply_changes(changes)
+            verbose, agent.verbose = agent.verbose, False
+            try:
+                agent.run_simple_analysis()
+            finally:
+                agent.verbose = verbose
+            if on_update is not None:
+                on_update(agent, changes, time.perf_counter() - start)
+    finally:
+        if watcher is not None:
+            watcher.close()
+        if agent.cache is not None:
+            agent.cache.close()
+            agent.cache = None
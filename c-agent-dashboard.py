@@ -5,40 +5,36 @@ Simple HTTP server for monitoring and controlling the C-Agent
 """
 
 import http.server
-import socketserver
+import argparse
+import html
 import json
 import os
-import subprocess
+import platform
+import sqlite3
+import threading
 import time
+import urllib.parse
 from datetime import datetime
 
-class CAgentHandler(http.server.SimpleHTTPRequestHandler):
-    def do_GET(self):
-        if self.path == '/' or self.path == '/dashboard':
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html')
-            self.end_headers()
-            self.wfile.write(self.generate_dashboard_html().encode())
-        elif self.path == '/api/status':
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps(self.get_status()).encode())
-        elif self.path == '/api/system':
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps(self.get_system_info()).encode())
-        elif self.path.startswith('/api/analyze'):
-            self.handle_analysis_request()
-        else:
-            self.send_response(404)
-            self.send_header('Content-type', 'text/html')
-            self.end_headers()
-            self.wfile.write(b'<h1>404 - Not Found</h1>')
+from dashboard_server import DashboardServer, DashboardHandlerMixin, CachedResponse, DEFAULT_MAX_WORKERS, serve
+from dashboard_metrics import SystemSampler, DEFAULT_INTERVAL
+from dashboard_events import EventHub, stream_events, DEFAULT_MAX_STREAMS
+from dashboard_jobs import JobQueue, DEFAULT_JOB_WORKERS
+from dashboard_limits import AdmissionControl, serve_limited, parse_route_limit, DEFAULT_MAX_CONCURRENT
+from agent_task import SimpleAgentTask
+from agent_report import find_report, read_report
+from agent_history import HistoryStore, parse_time, DEFAULT_POINTS
+from agent_index import ReportIndex, INDEX_NAME, DEFAULT_LIMIT
+from agent_headers import HeaderIndex, DEFAULT_TOP
 
-    def generate_dashboard_html(self):
-        return f"""
+STATUS_PUBLISH_INTERVAL = 1.0
+# The report file is only stat()ed, so it can be checked often: a watch-mode
+# re-analysis (agent_task.py --watch) reaches browsers well within a second
+REPORT_POLL_INTERVAL = 0.25
+# Largest JSON body accepted by POST /api/analyze (its options are a few bytes)
+MAX_ANALYSIS_BODY = 64 * 1024
+
+DASHBOARD_TEMPLATE = """
 <!DOCTYPE html>
 <html lang="es">
 <head>
@@ -157,21 +153,21 @@ class CAgentHandler(http.server.SimpleHTTPRequestHandler):
     <div class="header">
         <h1>🛡️ C-Agent Dashboard</h1>
         <p>Security & Development Agent Monitor</p>
-        <p>Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
+        <p>Started at: {started_at}</p>
     </div>
 
     <div class="container">
         <div class="stats-grid">
             <div class="stat-card">
-                <div class="stat-number">{len(os.listdir('src')) if os.path.exists('src') else 0}</div>
+                <div class="stat-number" id="src-count">{src_count}</div>
                 <div>Source Files</div>
             </div>
             <div class="stat-card">
-                <div class="stat-number">{len(os.listdir('.'))}</div>
+                <div class="stat-number" id="total-files">{total_files}</div>
                 <div>Total Files</div>
             </div>
             <div class="stat-card">
-                <div class="stat-number">{datetime.now().strftime('%H:%M')}</div>
+                <div class="stat-number" id="current-time">{current_time}</div>
                 <div>Current Time</div>
             </div>
             <div class="stat-card">
@@ -193,15 +189,23 @@ class CAgentHandler(http.server.SimpleHTTPRequestHandler):
             <div class="system-info">
                 <div class="info-card">
                     <strong>Directory</strong><br>
-                    {os.getcwd()}
+                    {cwd}
                 </div>
                 <div class="info-card">
                     <strong>Python Version</strong><br>
-                    {subprocess.run(['python3', '--version'], capture_output=True, text=True).stdout.strip()}
+                    {python_version}
                 </div>
                 <div class="info-card">
                     <strong>Files in src/</strong><br>
-                    {', '.join(os.listdir('src')[:5])}... if len(os.listdir('src')) > 5 else ', '.join(os.listdir('src'))}
+                    {src_listing}
+                </div>
+                <div class="info-card">
+                    <strong>CPU</strong><br>
+                    <span id="cpu-usage">—</span>
+                </div>
+                <div class="info-card">
+                    <strong>Memory</strong><br>
+                    <span id="memory-usage">—</span>
                 </div>
             </div>
         </div>
@@ -248,86 +252,525 @@ class CAgentHandler(http.server.SimpleHTTPRequestHandler):
                 .then(data => addLog('Documentation generated: ' + data.result));
         }}
 
+        // Analyses run as background jobs: queue one, then follow its progress
+        function watchJob(jobId, label) {{
+            fetch('/api/jobs/' + jobId)
+                .then(response => response.json())
+                .then(job => {{
+                    if (job.status === 'done') {{
+                        addLog(label + ' completed');
+                    }} else if (job.status === 'failed') {{
+                        addLog(label + ' failed: ' + job.error);
+                    }} else {{
+                        addLog(label + ': ' + job.progress.message);
+                        setTimeout(() => watchJob(jobId, label), 1000);
+                    }}
+                }});
+        }}
+
+        function queueAnalysis(type, label) {{
+            fetch('/api/analyze?type=' + type, {{method: 'POST'}})
+                .then(response => response.json().then(data => {{
+                    if (response.status === 429) {{
+                        const delay = response.headers.get('Retry-After') || data.retry_after;
+                        addLog(label + ' not queued: too many requests, retry in ' + delay + 's');
+                    }} else if (!response.ok) {{
+                        addLog(label + ' not queued: ' + data.error);
+                    }} else {{
+                        addLog(data.result);
+                        watchJob(data.job_id, label);
+                    }}
+                }}));
+        }}
+
         function analyzeDependencies() {{
             addLog('Analyzing dependencies...');
-            fetch('/api/analyze?type=dependencies')
-                .then(response => response.json())
-                .then(data => addLog('Dependencies analyzed: ' + data.result));
+            queueAnalysis('dependencies', 'Dependency analysis');
         }}
 
         function runFullAnalysis() {{
             addLog('Running full analysis...');
-            fetch('/api/analyze?type=full')
-                .then(response => response.json())
-                .then(data => addLog('Full analysis completed: ' + data.result));
+            queueAnalysis('full', 'Full analysis');
         }}
 
-        // Auto-refresh every 5 seconds
-        setInterval(() => {{
-            fetch('/api/status')
-                .then(response => response.json())
-                .then(data => {{
-                    // Update metrics if needed
-                }});
-        }}, 5000);
+        // The page is served from cache: keep the clock current on the client
+        function updateClock() {{
+            const now = new Date();
+            document.getElementById('current-time').textContent =
+                now.toLocaleTimeString([], {{hour: '2-digit', minute: '2-digit', hour12: false}});
+        }}
+        updateClock();
+        setInterval(updateClock, 30000);
+
+        // Live updates pushed by the server (only the fields that changed)
+        function setText(id, value) {{
+            if (value !== undefined && value !== null) {{
+                document.getElementById(id).textContent = value;
+            }}
+        }}
+
+        const events = new EventSource('/api/events');
+        events.addEventListener('status', event => {{
+            const data = JSON.parse(event.data);
+            setText('src-count', data.files_analyzed);
+            setText('total-files', data.total_files);
+        }});
+        events.addEventListener('system', event => {{
+            const data = JSON.parse(event.data);
+            if (data.cpu) {{
+                setText('cpu-usage', data.cpu.percent !== null ? data.cpu.percent + ' %' : data.cpu.load_avg[0].toFixed(2) + ' load');
+            }}
+            if (data.memory) {{
+                setText('memory-usage', data.memory.used_percent + ' % used');
+            }}
+        }});
+        // A new analysis report (e.g. from agent_task.py --watch); deltas are merged
+        const report = {{}};
+        events.addEventListener('report', event => {{
+            Object.assign(report, JSON.parse(event.data));
+            addLog(`Analysis report ${{report.timestamp}}: ${{report.files_analyzed}} files, ` +
+                   `${{report.dependencies_found}} includes, ${{report.include_cycles}} include cycles`);
+        }});
     </script>
 </body>
 </html>
-        """
+"""
+
+class ProjectSnapshot:
+    """Directory listings shown by the dashboard, re-read only when a directory changes"""
+
+    WATCHED = ('.', 'src')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._key = None
+        self.version = 0
+        self.changed_at = None
+        self.data = {}
+
+    def _stat_key(self):
+        key = []
+        for path in self.WATCHED:
+            try:
+                key.append(os.stat(path).st_mtime_ns)
+            except OSError:
+                key.append(None)
+        return tuple(key)
+
+    def get(self):
+        key = self._stat_key()
+        with self._lock:
+            if key != self._key:
+                self.data = {
+                    'src_files': os.listdir('src') if os.path.isdir('src') else [],
+                    'total_files': len(os.listdir('.')),
+                }
+                self._key = key
+                self.version += 1
+                self.changed_at = datetime.now()
+            return self.version, self.data
+
+class DashboardPage:
+    """Rendered dashboard page, cached as a CachedResponse per snapshot version"""
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.started_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self.python_version = f"Python {platform.python_version()}"
+        self._lock = threading.Lock()
+        self._version = None
+        self._response = None
+
+    def render(self, data):
+        src_files = data['src_files']
+        src_listing = ', '.join(src_files[:5]) + ('...' if len(src_files) > 5 else '')
+        return DASHBOARD_TEMPLATE.format(
+            started_at=self.started_at,
+            src_count=len(src_files),
+            total_files=data['total_files'],
+            current_time=datetime.now().strftime('%H:%M'),
+            cwd=html.escape(os.getcwd()),
+            python_version=self.python_version,
+            src_listing=html.escape(src_listing),
+        )
+
+    def get(self):
+        version, data = self.snapshot.get()
+        with self._lock:
+            if version != self._version:
+                self._response = CachedResponse(self.render(data), 'text/html; charset=utf-8')
+                self._version = version
+            return self._response
+
+class ReportCache:
+    """Latest analysis report written by agent_task.py, re-read only when the file changes.
+
+    Any report format is accepted (JSON, NDJSON, gzip); for NDJSON only the
+    header line is read, never the per-file records.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._key = None
+        self._report = None
+
+    def get(self):
+        path = find_report(self.directory)
+        try:
+            st = os.stat(path) if path else None
+        except OSError:
+            st = None
+        if st is None:
+            return None
+        key = (path, st.st_mtime_ns, st.st_size, st.st_ino)
+        with self._lock:
+            if key != self._key:
+                try:
+                    self._report = read_report(path)
+                except (OSError, ValueError, EOFError):
+                    return self._report
+                self._key = key
+            return self._report
+
+class IndexCache:
+    """Per-file index written by agent_task.py, opened once and reopened only when replaced.
+
+    The index is a read-only, memory-mapped SQLite file; a connection to a
+    replaced index keeps reading the old file until its last page is served.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._key = None
+        self._index = None
+
+    def get(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        key = (st.st_mtime_ns, st.st_size, st.st_ino)
+        with self._lock:
+            if key != self._key:
+                try:
+                    self._index = ReportIndex(self.path)
+                except (sqlite3.Error, ValueError):
+                    return self._index
+                self._key = key
+            return self._index
+
+SERVER_STARTED = time.time()
+PROJECT_SNAPSHOT = ProjectSnapshot()
+DASHBOARD_PAGE = DashboardPage(PROJECT_SNAPSHOT)
+EVENT_HUB = EventHub()
+ANALYSIS_REPORT = ReportCache('reports')
+ANALYSIS_INDEX = IndexCache(os.path.join('reports', INDEX_NAME))
+HISTORY_PATH = os.path.join('reports', 'history.sqlite')
+# Per-client rate limits and a concurrency cap for the routes that scan, query or spawn work
+ADMISSION = AdmissionControl()
+SYSTEM_SAMPLER = SystemSampler(on_sample=lambda sample: EVENT_HUB.publish('system', sample))
+
+def stream_status():
+    """Status fields pushed over /api/events (timestamps excluded so unchanged status stays silent)"""
+    _, data = PROJECT_SNAPSHOT.get()
+    return {
+        'files_analyzed': len(data['src_files']),
+        'total_files': data['total_files'],
+        'vulnerabilities_found': 0,
+        'documentation_generated': 1,
+    }
+
+ANALYSIS_JOBS = JobQueue()
+ANALYSIS_TYPES = ('full', 'dependencies')
+
+def run_analysis(analysis_type, progress):
+    """Job body: run SimpleAgentTask on the directory the dashboard serves"""
+    agent = SimpleAgentTask(project_path=os.getcwd())
+    if analysis_type == 'dependencies':
+        progress(0, 1, 'Analizando dependencias')
+        agent.analyze_dependencies()
+        progress(1, 1, 'Completado')
+    else:
+        agent.run_simple_analysis(progress)
+    return job_summary(agent.results)
+
+def job_summary(results):
+    """Headline numbers kept with a finished job; per-file details are served by the index API"""
+    files = results.get('files', {})
+    dependencies = results.get('dependencies', {})
+    graph = results.get('include_graph', {})
+    summary = {
+        'files_analyzed': files.get('total_files', 0),
+        'dependencies_found': dependencies.get('total_includes', 0),
+        'system_includes': dependencies.get('system_includes', 0),
+        'local_includes': dependencies.get('local_includes', 0),
+        'graph_nodes': graph.get('nodes', 0),
+        'include_cycles': len(graph.get('cycles', ())),
+        'code_totals': results.get('code_metrics', {}).get('totals'),
+        'report_path': results.get('report_path'),
+        'errors': {phase: data['error'] for phase, data in results.items()
+                   if isinstance(data, dict) and 'error' in data},
+    }
+    if results.get('index_path'):
+        summary['details'] = {'files': '/api/files', 'includes': '/api/includes'}
+    return summary
+
+def publish_status_forever():
+    while not EVENT_HUB.closed:
+        EVENT_HUB.publish('status', stream_status())
+        time.sleep(STATUS_PUBLISH_INTERVAL)
+
+def report_summary():
+    """Headline numbers of the latest analysis report pushed over /api/events"""
+    report = ANALYSIS_REPORT.get()
+    if not report:
+        return None
+    summary = report.get('summary', {})
+    return {
+        'timestamp': report.get('timestamp'),
+        'files_analyzed': summary.get('files_analyzed', 0),
+        'dependencies_found': summary.get('dependencies_found', 0),
+        'include_cycles': len(report.get('include_graph', {}).get('cycles', [])),
+    }
+
+def publish_report_forever():
+    while not EVENT_HUB.closed:
+        summary = report_summary()
+        if summary is not None:
+            EVENT_HUB.publish('report', summary)
+        time.sleep(REPORT_POLL_INTERVAL)
+
+class CAgentHandler(DashboardHandlerMixin, http.server.SimpleHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == '/' or self.path == '/dashboard':
+            self.send_cached(DASHBOARD_PAGE.get())
+        elif self.path == '/api/status':
+            self.send_json(self.get_status())
+        elif self.path == '/api/system':
+            serve_limited(self, ADMISSION, 'system', lambda: self.send_json(self.get_system_info()))
+        elif self.path == '/api/system/history':
+            serve_limited(self, ADMISSION, 'system', lambda: self.send_json(SYSTEM_SAMPLER.history()))
+        elif self.path == '/api/events':
+            stream_events(self, EVENT_HUB)
+        elif self.path.startswith('/api/analyze'):
+            serve_limited(self, ADMISSION, 'analyze', self.handle_analysis_request)
+        elif self.path == '/api/profile':
+            self.handle_profile_request()
+        elif self.path.startswith('/api/history'):
+            serve_limited(self, ADMISSION, 'history', self.handle_history_request)
+        elif self.path == '/api/files' or self.path.startswith('/api/files?'):
+            serve_limited(self, ADMISSION, 'files', lambda: self.handle_index_request(
+                'files', ('directory', 'ext', 'sort', 'order')))
+        elif self.path == '/api/includes' or self.path.startswith('/api/includes?'):
+            serve_limited(self, ADMISSION, 'includes', lambda: self.handle_index_request(
+                'includes', ('header', 'header_prefix', 'kind', 'directory', 'path', 'sort', 'order')))
+        elif self.path == '/api/headers' or self.path.startswith('/api/headers?'):
+            serve_limited(self, ADMISSION, 'headers', self.handle_headers_request)
+        elif self.path == '/api/limits':
+            self.send_json(ADMISSION.stats())
+        elif self.path == '/api/jobs':
+            self.send_json(ANALYSIS_JOBS.list())
+        elif self.path.startswith('/api/jobs/'):
+            self.handle_job_request()
+        else:
+            self.send_body(b'<h1>404 - Not Found</h1>', 'text/html', status=404)
+
+    def do_POST(self):
+        if self.path.startswith('/api/analyze'):
+            serve_limited(self, ADMISSION, 'analyze', self.handle_analysis_request)
+        else:
+            self.send_body(b'<h1>404 - Not Found</h1>', 'text/html', status=404)
+
+    def generate_dashboard_html(self):
+        return DASHBOARD_PAGE.get().body.decode()
 
     def get_status(self):
+        # Apart from uptime (whole seconds) only fields that change with the
+        # project: polls within the same second are answered with 304 Not Modified
         return {
             'total_requests': 1,
-            'files_analyzed': len(os.listdir('src')) if os.path.exists('src') else 0,
+            'files_analyzed': stream_status()['files_analyzed'],
             'vulnerabilities_found': 0,
             'documentation_generated': 1,
-            'last_activity': str(datetime.now()),
-            'uptime': time.time()
+            'last_activity': str(PROJECT_SNAPSHOT.changed_at),
+            'started_at': SERVER_STARTED,
+            'uptime': int(time.time() - SERVER_STARTED)
         }
 
     def get_system_info(self):
         try:
-            cpu_info = subprocess.run(['top', '-l', '1'], capture_output=True, text=True).stdout
-            memory_info = subprocess.run(['free', '-h'], capture_output=True, text=True).stdout if os.path.exists('/bin/free') else 'Memory info not available'
-            disk_info = subprocess.run(['df', '-h', '/'], capture_output=True, text=True).stdout
-            
-            return {
-                'cpu': cpu_info.split('\n')[0] if cpu_info else 'CPU info not available',
-                'memory': memory_info.split('\n')[0] if memory_info else 'Memory info not available',
-                'disk': disk_info.split('\n')[1] if disk_info else 'Disk info not available'
-            }
+            return SYSTEM_SAMPLER.latest()
         except Exception as e:
             return {'error': str(e)}
 
+    def reject_body(self, payload, status):
+        """Error response for a request whose body may be unread: the connection is not reused"""
+        self.close_connection = True
+        self.send_body(json.dumps(payload), status=status, headers=[('Connection', 'close')])
+
     def handle_analysis_request(self):
-        query = self.path.split('?')[1] if '?' in self.path else ''
-        params = dict(param.split('=') for param in query.split('&') if '=' in param)
-        
-        analysis_type = params.get('type', 'unknown')
+        params = dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(self.path).query))
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            if length < 0:
+                raise ValueError(f"negative Content-Length: {length}")
+            if length > MAX_ANALYSIS_BODY:
+                self.reject_body({'error': f'Request body larger than {MAX_ANALYSIS_BODY} bytes'}, 413)
+                return
+            if length:
+                params.update(json.loads(self.rfile.read(length)))
+        except (ValueError, TypeError):
+            self.reject_body({'error': 'Request body must be a JSON object'}, 400)
+            return
         
-        # Simulate analysis
-        result = f"Analysis type '{analysis_type}' completed successfully"
+        analysis_type = params.get('type', 'full')
+        if analysis_type not in ANALYSIS_TYPES:
+            self.send_json({'error': f"Unknown analysis type '{analysis_type}'",
+                            'types': sorted(ANALYSIS_TYPES)}, status=400)
+            return
         
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.end_headers()
-        self.wfile.write(json.dumps({'result': result}).encode())
+        job, coalesced = ANALYSIS_JOBS.submit(analysis_type, analysis_type,
+                                              lambda progress: run_analysis(analysis_type, progress))
+        result = f"Analysis type '{analysis_type}' {'already running' if coalesced else 'queued'} as job {job.id}"
+        self.send_json({
+            'result': result,
+            'job_id': job.id,
+            'status': job.status,
+            'coalesced': coalesced,
+            'url': f'/api/jobs/{job.id}',
+        }, status=202)
+
+    def handle_profile_request(self):
+        report = ANALYSIS_REPORT.get()
+        if not report or 'instrumentation' not in report:
+            self.send_json({'error': 'No instrumented analysis report yet'}, status=404)
+            return
+        self.send_json({
+            'timestamp': report.get('timestamp'),
+            'instrumentation': report['instrumentation'],
+        })
+
+    def handle_history_request(self):
+        """Metric trends from reports/history.sqlite: the metric list, or one downsampled series"""
+        params = dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(self.path).query))
+        try:
+            start = parse_time(params['from']) if 'from' in params else None
+            end = parse_time(params['to']) if 'to' in params else None
+            points = int(params.get('points', DEFAULT_POINTS))
+        except ValueError as e:
+            self.send_json({'error': f'Invalid query: {e}'}, status=400)
+            return
+        try:
+            with HistoryStore(HISTORY_PATH, readonly=True) as store:
+                if 'metric' not in params:
+                    self.send_json({'metrics': store.metrics()})
+                    return
+                series = store.series(params['metric'], start, end, points)
+        except sqlite3.Error:
+            self.send_json({'error': 'No analysis history yet'}, status=404)
+            return
+        if not series['points'] and start is None and end is None:
+            self.send_json({'error': f"Unknown metric '{params['metric']}'"}, status=404)
+            return
+        self.send_json(series)
+
+    def handle_index_request(self, query, filters):
+        """One page of /api/files or /api/includes; follow next_cursor for the next page"""
+        params = dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(self.path).query))
+        index = ANALYSIS_INDEX.get()
+        if index is None:
+            self.send_json({'error': 'No analysis index yet'}, status=404)
+            return
+        options = {name: params[name] for name in filters if params.get(name)}
+        try:
+            page = getattr(index, query)(cursor=params.get('cursor'),
+                                         limit=int(params.get('limit', DEFAULT_LIMIT)), **options)
+        except ValueError as e:
+            self.send_json({'error': f'Invalid query: {e}'}, status=400)
+            return
+        page['generated_at'] = index.meta.get('timestamp')
+        self.send_json(page)
+
+    def handle_headers_request(self):
+        """Cross-project header usage: who includes a header, or the most included headers"""
+        params = dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(self.path).query))
+        try:
+            with HeaderIndex(readonly=True) as store:
+                if params.get('header') or params.get('header_prefix'):
+                    result = store.who_includes(params.get('header'), params.get('header_prefix'),
+                                                project=params.get('project'), kind=params.get('kind'),
+                                                cursor=params.get('cursor'),
+                                                limit=int(params.get('limit', DEFAULT_LIMIT)))
+                else:
+                    result = {'projects': store.projects(),
+                              'top_headers': store.top_headers(params.get('kind'),
+                                                               int(params.get('limit', DEFAULT_TOP)))}
+        except ValueError as e:
+            self.send_json({'error': f'Invalid query: {e}'}, status=400)
+            return
+        except sqlite3.Error:
+            self.send_json({'error': 'No header index yet'}, status=404)
+            return
+        self.send_json(result)
+
+    def handle_job_request(self):
+        job = ANALYSIS_JOBS.get(self.path[len('/api/jobs/'):].split('?')[0])
+        if job is None:
+            self.send_json({'error': 'Unknown job'}, status=404)
+        else:
+            self.send_json(job.to_dict())
 
 if __name__ == '__main__':
-    PORT = 8080
+    parser = argparse.ArgumentParser(description='C-Agent Dashboard Web Server')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int, default=DEFAULT_MAX_WORKERS,
+                        help='Maximum concurrent connections served')
+    parser.add_argument('--sample-interval', type=float, default=DEFAULT_INTERVAL,
+                        help='Seconds between system metric samples')
+    parser.add_argument('--max-streams', type=int, default=DEFAULT_MAX_STREAMS,
+                        help='Maximum concurrent /api/events subscribers (at most half of --workers)')
+    parser.add_argument('--job-workers', type=int, default=DEFAULT_JOB_WORKERS,
+                        help='Analyses that may run at the same time')
+    parser.add_argument('--limit', action='append', type=parse_route_limit, metavar='ROUTE=RATE[/BURST]',
+                        help='Per-client rate limit of a route in requests/second (repeatable, '
+                             'e.g. --limit analyze=0.2/3; routes: system, analyze, history, files, includes, headers)')
+    parser.add_argument('--max-concurrent', type=int, default=DEFAULT_MAX_CONCURRENT,
+                        help='Rate-limited requests served at the same time across all clients')
+    args = parser.parse_args()
+    PORT = args.port
     Handler = CAgentHandler
     
-    with socketserver.TCPServer(("", PORT), Handler) as httpd:
-        print(f"🌐 C-Agent Dashboard started at http://localhost:{PORT}")
+    DASHBOARD_PAGE.get()  # Render once at startup
+    # Each event stream holds a worker thread for its whole life: at most half
+    # of the pool, so regular requests always find a worker
+    EVENT_HUB = EventHub(max_streams=max(1, min(args.max_streams, args.workers // 2)))
+    ANALYSIS_JOBS = JobQueue(max_workers=args.job_workers)
+    ADMISSION = AdmissionControl(dict(args.limit or ()), max_concurrent=max(1, args.max_concurrent))
+    SYSTEM_SAMPLER.interval = args.sample_interval
+    SYSTEM_SAMPLER.start()
+    threading.Thread(target=publish_status_forever, name='status-publisher', daemon=True).start()
+    threading.Thread(target=publish_report_forever, name='report-publisher', daemon=True).start()
+    
+    with DashboardServer(("", PORT), Handler, max_workers=args.workers) as httpd:
+        httpd.stop_callbacks.append(EVENT_HUB.close)
+        httpd.stop_callbacks.append(ANALYSIS_JOBS.shutdown)
+        print(f"🌐 C-Agent Dashboard started at http://localhost:{PORT} ({args.workers} workers)")
         print("✅ Dashboard is ready!")
         print("📋 Available endpoints:")
         print("   GET /              - Main dashboard")
         print("   GET /api/status    - JSON status API")
         print("   GET /api/system    - System information")
-        print("   GET /api/analyze   - Analysis endpoints")
+        print("   GET /api/system/history - Recent system samples")
+        print("   GET /api/events    - Live status/metrics/reports (Server-Sent Events)")
+        print("   POST /api/analyze  - Queue an analysis job (?type=full|dependencies)")
+        print("   GET /api/jobs/<id> - Job progress and results")
+        print("   GET /api/profile   - Phase timings and counters of the last analysis")
+        print("   GET /api/history   - Metric trends (?metric=files.total_files&from=2025-01-01&points=200)")
+        print("   GET /api/files     - Analyzed files, paginated (?directory=src&ext=.c&sort=lines&cursor=...)")
+        print("   GET /api/includes  - All includes, paginated (?header=stdio.h&directory=src&cursor=...)")
+        print("   GET /api/headers   - Header usage across projects (?header=openssl/ssl.h or ?kind=system&limit=20)")
+        print("   GET /api/limits    - Rate limits and per-route admission counters")
         print("\n🛑 Press Ctrl+C to stop the server")
-        try:
-            httpd.serve_forever()
-        except KeyboardInterrupt:
-            print("\n🛑 Dashboard stopped")
-            httpd.shutdown()
+        serve(httpd)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+C-Agent Dashboard Events
+Server-Sent Events hub: topics are published as field-level deltas and only
+when their content changes; subscribers block on a condition variable.
+"""
+
+import json
+import threading
+from collections import deque
+
+HEARTBEAT_INTERVAL = 15
+DEFAULT_MAX_STREAMS = 100
+EVENT_LOG_SIZE = 256
+
+
+def format_event(event_id, topic, data):
+    """Encode one SSE frame"""
+    return f"id: {event_id}\nevent: {topic}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+
+class EventHub:
+    """Latest state per topic plus a bounded log of the deltas that produced it"""
+
+    def __init__(self, max_streams=DEFAULT_MAX_STREAMS):
+        self.max_streams = max_streams
+        self.state = {}
+        self.event_id = 0
+        self.closed = False
+        self._log = deque(maxlen=EVENT_LOG_SIZE)
+        self._condition = threading.Condition()
+        self._streams = threading.BoundedSemaphore(max_streams)
+
+    def publish(self, topic, data):
+        """Record a new value for a topic; subscribers only see the fields that changed"""
+        with self._condition:
+            previous = self.state.get(topic, {})
+            delta = {key: value for key, value in data.items() if previous.get(key) != value}
+            delta.update({key: None for key in previous if key not in data})
+            if not delta:
+                return False
+            self.state[topic] = dict(data)
+            self.event_id += 1
+            self._log.append((self.event_id, topic, delta))
+            self._condition.notify_all()
+            return True
+
+    def snapshot(self):
+        """(event id, [(topic, full state)]) for a new or lagging subscriber"""
+        with self._condition:
+            return self.event_id, [(topic, dict(data)) for topic, data in self.state.items()]
+
+    def wait(self, last_id, timeout=HEARTBEAT_INTERVAL):
+        """Block until there are events after last_id.
+
+        Returns a list of (id, topic, delta); an empty list on timeout (send a
+        heartbeat); or None if last_id has fallen out of the log and the
+        subscriber needs a fresh snapshot.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self.event_id > last_id or self.closed, timeout)
+            if self.event_id <= last_id:
+                return []
+            if not self._log or self._log[0][0] > last_id + 1:
+                return None
+            return [event for event in self._log if event[0] > last_id]
+
+    def acquire_stream(self):
+        """Reserve a stream slot; False when the connection limit is reached"""
+        return self._streams.acquire(blocking=False)
+
+    def release_stream(self):
+        self._streams.release()
+
+    def close(self):
+        """Wake every subscriber so streams end during shutdown"""
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+
+def stream_events(handler, hub):
+    """Serve an SSE stream on a dashboard request handler until the client leaves"""
+    if not hub.acquire_stream():
+        handler.send_body(json.dumps({'error': 'Too many event streams'}), status=503,
+                          headers=[('Retry-After', str(HEARTBEAT_INTERVAL))])
+        return
+    try:
+        handler.send_response(200)
+        handler.send_header('Content-type', 'text/event-stream')
+        handler.send_header('Cache-Control', 'no-cache')
+        handler.end_headers()
+        handler.close_connection = True
+        handler.wfile.write(b'retry: 5000\n\n')
+
+        # Resume after a reconnect when the browser's last event is still in the log
+        try:
+            last_id = int(handler.headers.get('Last-Event-ID', ''))
+            if last_id > hub.event_id:
+                last_id = None
+        except ValueError:
+            last_id = None
+
+        while not hub.closed:
+            if last_id is None:
+                last_id, topics = hub.snapshot()
+                frames = [format_event(last_id, topic, data) for topic, data in topics]
+            else:
+                events = hub.wait(last_id)
+                if events is None:
+                    last_id = None
+                    continue
+                if events:
+                    frames = [format_event(*event) for event in events]
+                    last_id = events[-1][0]
+                else:
+                    frames = [b': heartbeat\n\n']
+            if frames:
+                handler.wfile.write(b''.join(frames))
+    except (BrokenPipeError, ConnectionResetError):
+        pass
+    finally:
+        hub.release_stream()
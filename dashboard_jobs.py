@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+C-Agent Dashboard Jobs
+Background job queue for long-running analyses: a bounded worker pool,
+coalescing of identical in-flight requests and pollable progress.
+"""
+
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_JOB_WORKERS = 2
+# Finished jobs kept for GET /api/jobs/<id>; the oldest are forgotten first
+FINISHED_JOBS_KEPT = 50
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class Job:
+    def __init__(self, key, kind):
+        self.id = uuid.uuid4().hex[:12]
+        self.key = key
+        self.kind = kind
+        self.status = QUEUED
+        self.progress = {'step': 0, 'total': 0, 'message': 'Queued'}
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+
+    @property
+    def active(self):
+        return self.status in (QUEUED, RUNNING)
+
+    def to_dict(self, include_result=True):
+        data = {
+            'id': self.id,
+            'type': self.kind,
+            'status': self.status,
+            'progress': dict(self.progress),
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+            'error': self.error,
+        }
+        if include_result:
+            data['result'] = self.result
+        return data
+
+
+class JobQueue:
+    """Runs jobs on a bounded pool; identical active requests share one job"""
+
+    def __init__(self, max_workers=DEFAULT_JOB_WORKERS, keep=FINISHED_JOBS_KEPT):
+        self.keep = keep
+        self.jobs = OrderedDict()
+        self._active = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analysis-job')
+
+    def submit(self, key, kind, func):
+        """Queue func(progress) under key; returns (job, coalesced)"""
+        with self._lock:
+            job = self._active.get(key)
+            if job is not None:
+                return job, True
+            job = Job(key, kind)
+            self.jobs[job.id] = job
+            self._active[key] = job
+            self._forget_finished()
+        self._pool.submit(self._run, job, func)
+        return job, False
+
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return [job.to_dict(include_result=False) for job in self.jobs.values()]
+
+    def _forget_finished(self):
+        finished = [job_id for job_id, job in self.jobs.items() if not job.active]
+        for job_id in finished[:max(0, len(finished) - self.keep)]:
+            del self.jobs[job_id]
+
+    def _run(self, job, func):
+        def progress(step, total, message):
+            job.progress = {'step': step, 'total': total, 'message': message}
+
+        job.status = RUNNING
+        job.started = time.time()
+        try:
+            job.result = func(progress)
+            job.status = DONE
+        except Exception as e:
+            job.error = str(e)
+            job.progress['message'] = traceback.format_exception_only(type(e), e)[-1].strip()
+            job.status = FAILED
+        finally:
+            job.finished = time.time()
+            with self._lock:
+                if self._active.get(job.key) is job:
+                    del self._active[job.key]
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+C-Agent Dashboard Limits
+Admission control for the expensive routes: a token bucket per client and
+route, a global cap on requests being served concurrently, and per-route
+counters. Rejections are answered at once with 429 and Retry-After.
+"""
+
+import json
+import math
+import threading
+import time
+
+# Route -> (tokens per second, burst) for each client
+DEFAULT_ROUTE_LIMITS = {
+    'system': (5.0, 20),
+    'analyze': (0.2, 3),
+    'history': (5.0, 20),
+    'files': (10.0, 40),
+    'includes': (10.0, 40),
+    'headers': (10.0, 40),
+}
+# Expensive requests served at the same time, across all routes and clients
+DEFAULT_MAX_CONCURRENT = 8
+# Suggested retry delay when the concurrency cap is reached
+BUSY_RETRY_AFTER = 1
+# Buckets kept per route; the idlest ones are dropped beyond this
+MAX_CLIENTS = 10000
+
+
+def parse_route_limit(value):
+    """'analyze=0.2/3' -> ('analyze', (0.2, 3)) for --limit"""
+    route, _, spec = value.partition('=')
+    rate, _, burst = spec.partition('/')
+    try:
+        rate = float(rate)
+        burst = int(burst) if burst else max(1, math.ceil(rate))
+    except ValueError:
+        raise ValueError(f"Invalid limit '{value}' (expected ROUTE=RATE[/BURST])")
+    if route not in DEFAULT_ROUTE_LIMITS or rate <= 0 or burst < 1:
+        raise ValueError(f"Invalid limit '{value}' (routes: {', '.join(DEFAULT_ROUTE_LIMITS)})")
+    return route, (rate, burst)
+
+
+class TokenBuckets:
+    """One token bucket per client, refilled lazily when the client comes back"""
+
+    def __init__(self, rate, burst, max_clients=MAX_CLIENTS):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets = {}   # client -> (tokens, updated); insertion order = least recently used first
+
+    def take(self, client, now):
+        """0 if a token was taken, else the seconds until the next one (call under a lock)"""
+        tokens, updated = self._buckets.pop(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0
+        else:
+            wait = (1 - tokens) / self.rate
+        self._buckets[client] = (tokens, now)
+        if len(self._buckets) > self.max_clients:
+            # Drop the least recently seen client: at worst it gets a fresh burst
+            del self._buckets[next(iter(self._buckets))]
+        return wait
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class AdmissionControl:
+    """Rate limits and concurrency cap for the routes listed in limits"""
+
+    def __init__(self, limits=None, max_concurrent=DEFAULT_MAX_CONCURRENT):
+        limits = dict(DEFAULT_ROUTE_LIMITS, **(limits or {}))
+        self.max_concurrent = max_concurrent
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self._buckets = {route: TokenBuckets(rate, burst) for route, (rate, burst) in limits.items()}
+        self._counters = {
+            route: dict.fromkeys(('requests', 'admitted', 'rate_limited', 'busy', 'in_flight', 'peak_in_flight'), 0)
+            for route in limits
+        }
+
+    def enter(self, route, client):
+        """(True, 0) and a slot if the request may be served, else (False, retry_after).
+
+        An admitted request must call leave(route) when it is done.
+        """
+        now = time.monotonic()
+        with self._lock:
+            counters = self._counters[route]
+            counters['requests'] += 1
+            # A request turned away because the server is busy keeps its token
+            if self.in_flight >= self.max_concurrent:
+                counters['busy'] += 1
+                return False, BUSY_RETRY_AFTER
+            wait = self._buckets[route].take(client, now)
+            if wait:
+                counters['rate_limited'] += 1
+                return False, max(1, math.ceil(wait))
+            self.in_flight += 1
+            counters['admitted'] += 1
+            counters['in_flight'] += 1
+            counters['peak_in_flight'] = max(counters['peak_in_flight'], counters['in_flight'])
+            return True, 0
+
+    def leave(self, route):
+        with self._lock:
+            self.in_flight -= 1
+            self._counters[route]['in_flight'] -= 1
+
+    def stats(self):
+        """Per-route counters and configured limits, for tuning"""
+        with self._lock:
+            return {
+                'max_concurrent': self.max_concurrent,
+                'in_flight': self.in_flight,
+                'routes': {
+                    route: dict(counters, rate=self._buckets[route].rate, burst=self._buckets[route].burst,
+                                clients=len(self._buckets[route]))
+                    for route, counters in self._counters.items()
+                },
+            }
+
+
+def _has_body(content_length):
+    """False only for a missing or zero Content-Length; anything unparsable may hide a body"""
+    try:
+        return int(content_length or 0) != 0
+    except ValueError:
+        return True
+
+
+def serve_limited(handler, control, route, respond):
+    """Call respond() if control admits the client on route, else answer 429 at once"""
+    admitted, retry_after = control.enter(route, handler.client_address[0])
+    if not admitted:
+        headers = [('Retry-After', str(retry_after))]
+        if _has_body(handler.headers.get('Content-Length')):
+            # The request body is never read: the connection cannot be reused
+            headers.append(('Connection', 'close'))
+            handler.close_connection = True
+        handler.send_body(json.dumps({'error': f"Too many requests for '{route}'", 'retry_after': retry_after}),
+                          status=429, headers=headers)
+        return
+    try:
+        respond()
+    finally:
+        control.leave(route)
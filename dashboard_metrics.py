@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+C-Agent Dashboard Metrics
+Background sampler for CPU, memory and disk usage. Reads /proc and statvfs
+directly so serving /api/system never forks a subprocess.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+DEFAULT_INTERVAL = 5.0
+DEFAULT_HISTORY = 120
+
+
+def read_cpu_times():
+    """(busy, total) jiffies from the aggregate line of /proc/stat, or None"""
+    try:
+        with open('/proc/stat', 'rb') as f:
+            fields = f.readline().split()
+    except OSError:
+        return None
+    if not fields or fields[0] != b'cpu':
+        return None
+    values = [int(v) for v in fields[1:9]]
+    idle = values[3] + (values[4] if len(values) > 4 else 0)
+    total = sum(values)
+    return total - idle, total
+
+
+def read_meminfo():
+    """Memory totals in bytes from /proc/meminfo, or None"""
+    wanted = {b'MemTotal:': 'total', b'MemAvailable:': 'available'}
+    info = {}
+    try:
+        with open('/proc/meminfo', 'rb') as f:
+            for line in f:
+                parts = line.split()
+                key = wanted.get(parts[0]) if parts else None
+                if key:
+                    info[key] = int(parts[1]) * 1024
+                    if len(info) == len(wanted):
+                        break
+    except OSError:
+        return None
+    if 'total' not in info:
+        return None
+    if 'available' in info:
+        info['used_percent'] = round(100.0 * (1 - info['available'] / info['total']), 1)
+    return info
+
+
+def read_disk(path):
+    """Disk usage of the filesystem holding path"""
+    st = os.statvfs(path)
+    total = st.f_blocks * st.f_frsize
+    free = st.f_bavail * st.f_frsize
+    used = (st.f_blocks - st.f_bfree) * st.f_frsize
+    return {
+        'path': path,
+        'total': total,
+        'free': free,
+        'used_percent': round(100.0 * used / (used + free), 1) if used + free else 0.0,
+    }
+
+
+class SystemSampler(threading.Thread):
+    """Samples system metrics every `interval` seconds into a ring buffer"""
+
+    def __init__(self, interval=DEFAULT_INTERVAL, history=DEFAULT_HISTORY, disk_path='/', on_sample=None):
+        super().__init__(name='system-sampler', daemon=True)
+        self.interval = interval
+        self.disk_path = disk_path
+        self.on_sample = on_sample
+        self.samples = deque(maxlen=history)
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._prev_cpu = None
+
+    def sample(self):
+        """Take one sample and append it to the ring buffer"""
+        with self._lock:
+            cpu = {'load_avg': list(os.getloadavg()) if hasattr(os, 'getloadavg') else None,
+                   'percent': None}
+            times = read_cpu_times()
+            if times is not None:
+                if self._prev_cpu is not None:
+                    busy = times[0] - self._prev_cpu[0]
+                    total = times[1] - self._prev_cpu[1]
+                    if total > 0:
+                        cpu['percent'] = round(100.0 * busy / total, 1)
+                self._prev_cpu = times
+            try:
+                disk = read_disk(self.disk_path)
+            except OSError as e:
+                disk = {'path': self.disk_path, 'error': str(e)}
+            sample = {
+                'timestamp': time.time(),
+                'cpu': cpu,
+                'memory': read_meminfo(),
+                'disk': disk,
+            }
+            self.samples.append(sample)
+        if self.on_sample is not None:
+            self.on_sample(sample)
+        return sample
+
+    def latest(self):
+        """Most recent sample; samples synchronously if the thread has not run yet"""
+        try:
+            return self.samples[-1]
+        except IndexError:
+            return self.sample()
+
+    def history(self):
+        return list(self.samples)
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.sample()
+
+    def start(self):
+        # Prime the CPU counters so the first interval already has a percentage
+        self.sample()
+        super().start()
+
+    def stop(self):
+        self._stop_event.set()
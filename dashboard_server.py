@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+C-Agent Dashboard Server
+Shared concurrent HTTP server for the dashboards: bounded worker pool,
+HTTP/1.1 keep-alive, graceful shutdown and a response layer with gzip
+negotiation, strong ETags and conditional GET (304 Not Modified).
+Idle keep-alive connections wait in a selector, not in a worker, so the
+pool only holds connections that have a request to serve.
+"""
+
+import functools
+import gzip
+import hashlib
+import http.server
+import json
+import selectors
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_MAX_WORKERS = 128
+# Idle keep-alive connections are closed after this many seconds
+KEEPALIVE_TIMEOUT = 15
+# Below this size gzip saves less than its own header and CPU cost
+GZIP_MIN_BYTES = 512
+
+
+def accepts_gzip(accept_encoding):
+    """True if an Accept-Encoding header allows gzip"""
+    for token in (accept_encoding or '').split(','):
+        name, _, params = token.strip().partition(';')
+        if name.strip().lower() in ('gzip', '*'):
+            return params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000')
+    return False
+
+
+def make_etag(body):
+    """Strong ETag of an uncompressed body"""
+    return '"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def gzip_etag(etag):
+    """ETag of the gzip representation: a strong ETag is per content coding"""
+    return etag[:-1] + '-gzip"'
+
+
+def etag_matches(if_none_match, etag):
+    """True if an If-None-Match header matches etag in either content coding"""
+    if not if_none_match:
+        return False
+    candidates = (etag, gzip_etag(etag))
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        # If-None-Match uses the weak comparison: W/ prefixes are ignored
+        if tag == '*' or tag.removeprefix('W/') in candidates:
+            return True
+    return False
+
+
+@functools.lru_cache(maxsize=32)
+def compress(body):
+    """gzip a body; repeated polls of the same payload are compressed once"""
+    return gzip.compress(body, compresslevel=6)
+
+
+class CachedResponse:
+    """Pre-encoded response body with its gzip variant and strong ETag"""
+
+    __slots__ = ('body', 'gzip_body', 'etag', 'content_type')
+
+    def __init__(self, body, content_type):
+        if isinstance(body, str):
+            body = body.encode()
+        self.body = body
+        self.content_type = content_type
+        self.gzip_body = gzip.compress(body, compresslevel=6)
+        self.etag = make_etag(body)
+
+
+class DashboardServer(http.server.ThreadingHTTPServer):
+    """ThreadingHTTPServer that hands requests to a bounded thread pool.
+
+    A worker serves one request at a time. Between requests a keep-alive
+    connection is parked in a selector watched by a single thread and goes
+    back to the pool only when its next request arrives, so idle browser
+    tabs never starve new connections of workers.
+    """
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, server_address, handler_class, max_workers=DEFAULT_MAX_WORKERS):
+        super().__init__(server_address, handler_class)
+        self.max_workers = max_workers
+        self.stopping = False
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='dashboard')
+        self._connections = set()
+        self._connections_lock = threading.Lock()
+        # Called on shutdown before draining the pool, e.g. to end long-lived streams
+        self.stop_callbacks = []
+        self._selector = selectors.DefaultSelector()
+        self._to_park = []
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ)
+        self._parker = threading.Thread(target=self._watch_idle, name='dashboard-keepalive', daemon=True)
+        self._parker.start()
+
+    def process_request(self, request, client_address):
+        with self._connections_lock:
+            self._connections.add(request)
+        self.pool.submit(self._serve_connection, request, client_address)
+
+    def _serve_connection(self, request, client_address):
+        try:
+            handler = self.RequestHandlerClass(request, client_address, self)
+        except Exception:
+            self.handle_error(request, client_address)
+            self._close_connection(request)
+            return
+        self._after_request(handler)
+
+    def _resume(self, handler):
+        try:
+            handler.resume()
+        except Exception:
+            self.handle_error(handler.request, handler.client_address)
+            handler.parked = False
+        self._after_request(handler)
+
+    def _after_request(self, handler):
+        """Park a kept-alive connection until its next request, or close it"""
+        if handler.parked and not self.stopping:
+            with self._connections_lock:
+                self._to_park.append((handler, time.monotonic()))
+            self._wake_w.send(b'\0')
+        else:
+            if handler.parked:
+                handler.release()
+            self._close_connection(handler.request)
+
+    def _close_connection(self, request):
+        self.shutdown_request(request)
+        with self._connections_lock:
+            self._connections.discard(request)
+
+    def _watch_idle(self):
+        """Selector loop: hand readable connections back to the pool, close expired ones"""
+        parked = {}
+        while not self.stopping:
+            events = self._selector.select(timeout=1)
+            now = time.monotonic()
+            for key, _ in events:
+                if key.fileobj is self._wake_r:
+                    try:
+                        while self._wake_r.recv(4096):
+                            pass
+                    except (BlockingIOError, OSError):
+                        pass
+                    continue
+                handler = key.data
+                self._selector.unregister(key.fileobj)
+                del parked[handler]
+                try:
+                    self.pool.submit(self._resume, handler)
+                except RuntimeError:
+                    # Pool already shut down
+                    handler.release()
+                    self._close_connection(handler.request)
+            with self._connections_lock:
+                newly_parked, self._to_park = self._to_park, []
+            for handler, since in newly_parked:
+                self._selector.register(handler.request, selectors.EVENT_READ, handler)
+                parked[handler] = since
+            for handler, since in list(parked.items()):
+                if now - since >= KEEPALIVE_TIMEOUT:
+                    self._selector.unregister(handler.request)
+                    del parked[handler]
+                    handler.release()
+                    self._close_connection(handler.request)
+        for handler in parked:
+            handler.release()
+            self._close_connection(handler.request)
+
+    def server_close(self):
+        # Stop accepting, wake in-flight readers (responses in flight can still
+        # be written), then drain the pool; parked connections are closed by
+        # the selector thread. serve() and the with block both call this: only the first one acts
+        if self.stopping:
+            return
+        self.stopping = True
+        super().server_close()
+        for callback in self.stop_callbacks:
+            callback()
+        self._wake_w.send(b'\0')
+        self._parker.join()
+        with self._connections_lock:
+            for request in self._connections:
+                try:
+                    request.shutdown(socket.SHUT_RD)
+                except OSError:
+                    pass
+        self.pool.shutdown(wait=True)
+        for handler, _ in self._to_park:
+            handler.release()
+            self.shutdown_request(handler.request)
+        self._to_park = []
+        self._selector.close()
+        self._wake_r.close()
+        self._wake_w.close()
+
+
+class DashboardHandlerMixin:
+    """Keep-alive request handling shared by the dashboard handlers"""
+
+    protocol_version = 'HTTP/1.1'
+    timeout = KEEPALIVE_TIMEOUT
+    # Headers and body go out in separate writes; without TCP_NODELAY every
+    # keep-alive response would wait on the peer's delayed ACK
+    disable_nagle_algorithm = True
+
+    parked = False
+
+    def handle(self):
+        """Serve the requests already received; park the connection if it stays open"""
+        self.parked = False
+        self.close_connection = True
+        self.handle_one_request()
+        while not self.close_connection and not self.server.stopping:
+            if not self._request_buffered():
+                # Idle: the server waits for the next request in its selector
+                self.parked = True
+                return
+            self.handle_one_request()
+
+    def _request_buffered(self):
+        """True if the next request (pipelined) is already in the read buffer"""
+        self.connection.settimeout(0)
+        try:
+            return bool(self.rfile.peek(1))
+        except (BlockingIOError, OSError):
+            return False
+        finally:
+            self.connection.settimeout(self.timeout)
+
+    def finish(self):
+        # A parked connection keeps its buffered files for the next request
+        if not self.parked:
+            super().finish()
+
+    def resume(self):
+        """Serve the next request of a parked connection (from a pool worker)"""
+        self.handle()
+        self.finish()
+
+    def release(self):
+        """Flush and close the files of a parked connection that will not be resumed"""
+        self.parked = False
+        try:
+            super().finish()
+        except OSError:
+            pass
+
+    def send_body(self, body, content_type='application/json', status=200, headers=()):
+        """Send a complete response; Content-Length keeps the connection reusable"""
+        if isinstance(body, str):
+            body = body.encode()
+        self.send_response(status)
+        if content_type:
+            self.send_header('Content-type', content_type)
+        if status != 304:
+            self.send_header('Content-Length', str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        if self.server.stopping:
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+        self.end_headers()
+        if body and self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def send_content(self, body, content_type, etag=None, gzip_body=None):
+        """Send a 200 response with a strong ETag, honouring If-None-Match and Accept-Encoding.
+
+        Clients revalidate on every request (Cache-Control: no-cache), so an
+        unchanged payload costs a 304 with headers only.
+        """
+        if isinstance(body, str):
+            body = body.encode()
+        etag = etag or make_etag(body)
+        use_gzip = len(body) >= GZIP_MIN_BYTES and accepts_gzip(self.headers.get('Accept-Encoding'))
+        headers = [('ETag', gzip_etag(etag) if use_gzip else etag), ('Vary', 'Accept-Encoding'),
+                   ('Cache-Control', 'no-cache')]
+        if etag_matches(self.headers.get('If-None-Match'), etag):
+            self.send_body(b'', None, status=304, headers=headers)
+        elif use_gzip:
+            headers.append(('Content-Encoding', 'gzip'))
+            self.send_body(gzip_body if gzip_body is not None else compress(body), content_type, headers=headers)
+        else:
+            self.send_body(body, content_type, headers=headers)
+
+    def send_cached(self, response):
+        """Send a CachedResponse (its gzip variant and ETag are computed once)"""
+        self.send_content(response.body, response.content_type, response.etag, response.gzip_body)
+
+    def send_json(self, payload, status=200):
+        """Send a JSON payload; successful ones go through send_content"""
+        body = json.dumps(payload).encode()
+        if status == 200:
+            self.send_content(body, 'application/json')
+        else:
+            self.send_body(body, 'application/json', status=status)
+
+
+def serve(httpd):
+    """Serve until Ctrl+C or SIGTERM, then shut down gracefully"""
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Dashboard stopped")
+    finally:
+        httpd.server_close()
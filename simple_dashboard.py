@@ -5,18 +5,15 @@ Minimal HTTP server for demonstration
 """
 
 import http.server
-import socketserver
 import os
 import json
 from datetime import datetime
 
-class SimpleDashboard(http.server.SimpleHTTPRequestHandler):
+from dashboard_server import DashboardServer, DashboardHandlerMixin, serve
+
+class SimpleDashboard(DashboardHandlerMixin, http.server.SimpleHTTPRequestHandler):
     def do_GET(self):
         if self.path == '/':
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html')
-            self.end_headers()
-            
             html = f"""
             <!DOCTYPE html>
             <html>
@@ -65,7 +62,7 @@ class SimpleDashboard(http.server.SimpleHTTPRequestHandler):
                     
                     <h3>📊 Project Information</h3>
                     <p><strong>Current Directory:</strong> {os.getcwd()}</p>
-                    <p><strong>Files in src/:</strong> {', '.join(os.listdir('src')[:5])}... if len(os.listdir('src')) > 5 else ', '.join(os.listdir('src'))}</p>
+                    <p><strong>Files in src/:</strong> {', '.join(os.listdir('src')[:5]) + '...' if len(os.listdir('src')) > 5 else ', '.join(os.listdir('src'))}</p>
                     
                     <h3>📈 Real-time Logs</h3>
                     <div class="log">
@@ -87,23 +84,18 @@ class SimpleDashboard(http.server.SimpleHTTPRequestHandler):
             </html>
             """
             
-            self.wfile.write(html.encode())
+            self.send_content(html, 'text/html; charset=utf-8')
         else:
-            self.send_response(404)
-            self.end_headers()
-            self.wfile.write(b'<h1>404 - Not Found</h1>')
+            self.send_body(b'<h1>404 - Not Found</h1>', 'text/html', status=404)
 
 if __name__ == '__main__':
     PORT = 8080
     Handler = SimpleDashboard
     
-    with socketserver.TCPServer(("", PORT), Handler) as httpd:
+    with DashboardServer(("", PORT), Handler) as httpd:
         print(f"🌐 C-Agent Dashboard started at http://localhost:{PORT}")
         print("✅ Dashboard is ready!")
         print("📋 Available endpoints:")
         print("   GET /              - Main dashboard")
         print("\n🛑 Press Ctrl+C to stop the server")
-        try:
-            httpd.serve_forever()
-        except KeyboardInterrupt:
-            print("\n🛑 Dashboard stopped")
+        serve(httpd)
@@ -0,0 +1,74 @@
+"""El grafo incremental (modo watch) da siempre lo mismo que uno construido desde cero"""
+
+import random
+import unittest
+from unittest import mock
+
+import agent_graph
+from agent_graph import IncludeGraph, IncrementalIncludeGraph
+from agent_includes import SYSTEM, LOCAL, MACRO
+from agent_scanner import scan_order_key
+
+INCLUDE_PATHS = ('include',)
+PATHS = ([f'./src/m{i}.c' for i in range(12)] + [f'./src/s{i}.h' for i in range(6)]
+         + [f'./include/h{i}.h' for i in range(8)] + [f'./include/sub/h{i}.h' for i in range(4)])
+HEADERS = ([(LOCAL, f's{i}.h') for i in range(6)] + [(LOCAL, f'../include/h{i}.h') for i in range(8)]
+           + [(SYSTEM, f'h{i}.h') for i in range(8)] + [(SYSTEM, f'sub/h{i}.h') for i in range(4)]
+           + [(LOCAL, 'missing.h'), (SYSTEM, 'stdio.h'), (MACRO, 'CONFIG_H')])
+
+
+def random_includes(rng):
+    if rng.random() < 0.05:
+        return None    # ilegible
+    return [rng.choice(HEADERS) for _ in range(rng.randrange(5))]
+
+
+def full_report(files):
+    sources = sorted(files, key=scan_order_key)
+    graph = IncludeGraph(INCLUDE_PATHS).add_nodes(sources)
+    for path in sources:
+        if files[path] is not None:
+            graph.add_file(path, files[path])
+    return graph.to_report(), graph.rebuild_counts()
+
+
+class IncrementalGraphTest(unittest.TestCase):
+    def check_sequence(self, seed, steps=60):
+        rng = random.Random(seed)
+        files = {path: random_includes(rng) for path in rng.sample(PATHS, len(PATHS) // 2)}
+        graph = None
+        for step in range(steps):
+            if step:
+                for _ in range(rng.randrange(1, 6)):
+                    path = rng.choice(PATHS)
+                    action = rng.random()
+                    if action < 0.3:
+                        files.pop(path, None)
+                    else:
+                        files[path] = random_includes(rng)
+            sources = sorted(files, key=scan_order_key)
+            graph = (graph or IncrementalIncludeGraph(INCLUDE_PATHS)).sync_nodes(sources)
+            for path in sources:
+                graph.set_file(path, files[path])
+            graph.refresh()
+            with self.subTest(seed=seed, step=step):
+                report, counts = full_report(files)
+                self.assertEqual(graph.to_report(), report)
+                self.assertEqual(graph.rebuild_counts(), counts)
+        return graph
+
+    def test_random_changes_match_full_build(self):
+        for seed in range(20):
+            self.check_sequence(seed)
+
+    def test_compaction_matches_full_build(self):
+        with mock.patch.object(agent_graph, 'COMPACT_MIN_REMOVED', 1), \
+                mock.patch.object(agent_graph, 'COMPACT_RATIO', 8):
+            for seed in range(20):
+                graph = self.check_sequence(seed)
+                # Los nodos eliminados no se acumulan: se compactan al pasar del umbral
+                self.assertLess(len(graph.removed) * 8, len(graph.nodes) + 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
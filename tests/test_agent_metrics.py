@@ -0,0 +1,42 @@
+"""Las métricas de un archivo no dependen de cómo se corte en bloques"""
+
+import io
+import unittest
+from unittest import mock
+
+import agent_includes
+from agent_metrics import SourceMetrics
+
+SOURCES = [
+    # Directiva continuada seguida de una línea en blanco dentro del mismo bloque
+    b'#define A 1 \\\n\nint x;\n#define B \\\n  2\nint f(void)\n{\n  return 0;\n}\n/* c\n c */\n',
+    # Continuaciones encadenadas, llaves en comentarios y cadenas continuadas
+    b'#define A \\\n\\\n\n#define C \\\n\n\nint g(int a)\n{\n  /* { */ return a; // }\n}\n"s\\\n"\n#if X\n#endif\n',
+    # Continuación al final del archivo y comentario sin cerrar
+    b'int h(void) { return 1; }\n/* abierto\n\n#define D \\\n',
+]
+
+
+def metrics_for(source, block_bytes):
+    metrics = SourceMetrics()
+    with mock.patch.object(agent_includes, 'BLOCK_BYTES', block_bytes):
+        agent_includes.scan_includes(io.BytesIO(source), None, metrics)
+    return metrics.to_tuple()
+
+
+class BlockSizeTest(unittest.TestCase):
+    def test_same_metrics_for_every_block_size(self):
+        for source in SOURCES:
+            expected = metrics_for(source, agent_includes.BLOCK_BYTES)
+            for block_bytes in range(1, len(source) + 1):
+                with self.subTest(source=source, block_bytes=block_bytes):
+                    self.assertEqual(metrics_for(source, block_bytes), expected)
+
+    def test_continued_directive_ending_inside_block(self):
+        lines, blank, comment, code, functions, longest, name = metrics_for(SOURCES[0], agent_includes.BLOCK_BYTES)
+        self.assertEqual((lines, blank, comment, code), (11, 0, 2, 9))
+        self.assertEqual((functions, longest, name), (1, 3, 'f'))
+
+
+if __name__ == '__main__':
+    unittest.main()